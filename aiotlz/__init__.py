@@ -4,6 +4,14 @@ The ``aiotlz`` package is installed when ``aiotoolz`` is installed.
 It provides a convenient way to use functions from ``cytoolz``--a faster
 Cython implementation of ``aiotoolz``--if it is installed, otherwise it uses
 functions from ``aiotoolz``.
+
+``cytoolz`` doesn't understand coroutines, so functions that are asynchronous
+in ``aiotoolz`` are chosen per call: calls whose callables and iterables are
+all synchronous go to ``cytoolz``, while calls with a coroutine function,
+async callable object or async iterable go to ``aiotoolz``.  Either way the
+call returns an awaitable, as in ``aiotoolz``.  Classes and functions
+returning asynchronous callables, such as ``curry``, ``juxt`` and
+``compose``, always come from ``aiotoolz``.
 """
 
 from . import _build_tlz
@@ -1,15 +1,54 @@
+import asyncio
+import functools
+import inspect
 import sys
 import types
+import weakref
 import aiotoolz
+from aiotoolz.compatibility import PY37
 from importlib import import_module
 
 
+def is_async_callable(func):
+    """ Does calling ``func`` return an awaitable?
+
+    True for coroutine functions, partials of them, and objects with an
+    ``async def __call__`` such as ``curry``, ``Compose`` or ``juxt`` objects
+    from ``aiotoolz``.
+    """
+    while isinstance(func, functools.partial):
+        func = func.func
+    if asyncio.iscoroutinefunction(func):
+        return True
+    if isinstance(func, type):
+        return False
+    return asyncio.iscoroutinefunction(getattr(func, '__call__', None))
+
+
 class TlzLoader(object):
-    """ Finds and loads ``aiotlz`` modules when added to sys.meta_path"""
+    """ Finds and loads ``aiotlz`` modules when added to sys.meta_path
+
+    When ``cytoolz`` is installed, functions whose ``aiotoolz`` version is
+    asynchronous are routed per call: to ``cytoolz`` when no argument is
+    asynchronous, and to ``aiotoolz`` otherwise.  See ``route``.  Classes
+    and functions returning asynchronous callables, such as ``curry``,
+    ``juxt`` or ``compose``, are always taken from ``aiotoolz``.
+    """
+    # Number of items of a ``thread_first`` form checked by has_async_args
+    form_items = 8
+
     def __init__(self):
+        # Functions taken from aiotoolz even if cytoolz has them, because
+        # they return asynchronous callables
         self.always_from_toolz = {
-            aiotoolz.pipe,
+            aiotoolz.compose,
+            aiotoolz.complement,
+            aiotoolz.memoize,
         }
+        # is_async_callable results for callables seen by routed calls
+        self.async_callables = weakref.WeakKeyDictionary()
+        # Routed functions by their aiotoolz function, shared by submodules
+        self.routed = {}
 
     def _load_toolz(self, fullname):
         rv = {}
@@ -54,8 +93,6 @@ class TlzLoader(object):
         toolz_mods = self._load_toolz(module.__name__)
         fast_mod = toolz_mods.get('cytoolz') or toolz_mods['aiotoolz']
         slow_mod = toolz_mods.get('aiotoolz') or toolz_mods['cytoolz']
-        module.__dict__.update(
-            aiotoolz.merge(fast_mod.__dict__, module.__dict__))
         package = fast_mod.__package__
         if package is not None:
             package, dot, submodules = package.partition('.')
@@ -66,22 +103,134 @@ class TlzLoader(object):
         # show file from aiotoolz during introspection
         module.__file__ = slow_mod.__file__
 
-        for k, v in fast_mod.__dict__.items():
-            tv = slow_mod.__dict__.get(k)
-            try:
-                hash(tv)
-            except TypeError:
-                tv = None
-            if tv in self.always_from_toolz:
-                module.__dict__[k] = tv
-            elif (
-                isinstance(v, types.ModuleType)
-                and v.__package__ == fast_mod.__name__
-            ):
-                package, dot, submodules = v.__name__.partition('.')
-                module_name = ''.join(['aiotlz', dot, submodules])
-                submodule = import_module(module_name)
-                module.__dict__[k] = submodule
+        # Attributes are copied over from ``fast_mod`` on first access
+        def __getattr__(name):
+            return self._resolve(module, fast_mod, slow_mod, name)
+
+        def __dir__():
+            return sorted(set(module.__dict__) | set(dir(fast_mod))
+                          | set(dir(slow_mod)))
+
+        module.__getattr__ = __getattr__
+        module.__dir__ = __dir__
+        if not PY37:  # pragma: no cover
+            for k in set(dir(fast_mod)) | set(dir(slow_mod)):
+                if k not in module.__dict__:
+                    self._resolve(module, fast_mod, slow_mod, k)
+
+    def _resolve(self, module, fast_mod, slow_mod, name):
+        tv = getattr(slow_mod, name, None)
+        try:
+            v = getattr(fast_mod, name)
+        except AttributeError:
+            # Only in aiotoolz
+            if tv is None:
+                raise AttributeError("module %r has no attribute %r"
+                                     % (module.__name__, name))
+            v = tv
+        try:
+            hash(tv)
+        except TypeError:
+            tv = None
+        if tv in self.always_from_toolz or isinstance(tv, type):
+            v = tv
+        elif tv is not None and tv is not v and self.is_routed(tv):
+            if tv not in self.routed:
+                self.routed[tv] = self.route(v, tv)
+            v = self.routed[tv]
+        elif (
+            isinstance(v, types.ModuleType)
+            and v.__name__.rpartition('.')[0] == fast_mod.__name__
+        ):
+            package, dot, submodules = v.__name__.partition('.')
+            module_name = ''.join(['aiotlz', dot, submodules])
+            v = import_module(module_name)
+        module.__dict__[name] = v
+        return v
+
+    def is_routed(self, func):
+        """ Should calls to ``func`` from ``aiotoolz`` be routed?"""
+        if isinstance(func, type):
+            return False
+        return (
+            asyncio.iscoroutinefunction(func)
+            or isinstance(func, aiotoolz.curry)
+        )
+
+    def is_async(self, func):
+        """ Cached ``is_async_callable``"""
+        try:
+            return self.async_callables[func]
+        except (KeyError, TypeError):
+            pass
+        rv = is_async_callable(func)
+        try:
+            self.async_callables[func] = rv
+        except TypeError:
+            # Not hashable or not weak-referenceable
+            pass
+        return rv
+
+    def has_async_args(self, args, kwargs):
+        """ Are any arguments asynchronous callables or iterables?
+
+        Only the arguments themselves are checked, and the first items of
+        tuples starting with a callable, such as the forms ``(func, *args)``
+        of ``thread_first`` and ``thread_last``.  Other containers are data
+        and aren't searched, so the check doesn't slow down with the size
+        of the input.  A synchronous function returning an awaitable counts
+        as synchronous.
+        """
+        is_async = self.is_async
+        for items in (args, kwargs.values()):
+            for arg in items:
+                if type(arg) is tuple and arg and callable(arg[0]):
+                    for item in arg[:self.form_items]:
+                        if callable(item):
+                            if is_async(item):
+                                return True
+                        elif hasattr(type(item), '__aiter__'):
+                            return True
+                elif callable(arg):
+                    if is_async(arg):
+                        return True
+                elif hasattr(type(arg), '__aiter__'):
+                    return True
+        return False
+
+    def route(self, fast, slow):
+        """ Call ``fast`` unless any argument is asynchronous, then ``slow``
+
+        ``fast`` is the compiled ``cytoolz`` function and ``slow`` its
+        ``aiotoolz`` counterpart.  Like ``slow``, the routed function is a
+        coroutine function, so its calls are awaited whatever the arguments.
+        An awaitable returned by ``fast`` is awaited too.  Partial
+        applications of curried functions are routed in turn.
+        """
+        has_async_args = self.has_async_args
+        route = self.route
+        curried = (isinstance(slow, aiotoolz.curry)
+                   and getattr(fast, 'func', None) is not None)
+
+        async def routed(*args, **kwargs):
+            if has_async_args(args, kwargs):
+                result = slow(*args, **kwargs)
+            else:
+                result = fast(*args, **kwargs)
+                if (
+                    curried
+                    and type(result) is type(fast)
+                    and result.func is fast.func
+                ):
+                    return route(result, slow.bind(*args, **kwargs))
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        functools.update_wrapper(routed, slow)
+        routed.fast = fast
+        routed.slow = slow
+        return routed
 
 
 class TlzSpec(object):
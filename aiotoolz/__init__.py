@@ -1,14 +1,12 @@
+from importlib import import_module
+
 from .itertoolz import *
 
 from .functoolz import *
 
 from .dicttoolz import *
 
-from .recipes import *
-
-from .compatibility import map, filter
-
-from . import sandbox
+from .compatibility import map, filter, PY37
 
 from functools import partial, reduce
 
@@ -17,6 +15,43 @@ sorted = sorted
 # Aliases
 comp = compose
 
-functoolz._sigs.create_signature_registry()
+# ``caches``, ``recipes``, ``sandbox`` and ``tracing`` are imported on first
+# attribute access
+_lazy_attrs = {
+    'countby': 'recipes',
+    'partitionby': 'recipes',
+    'caches': None,
+    'recipes': None,
+    'sandbox': None,
+    'tracing': None,
+}
+
+__all__ = (itertoolz.__all__ + functoolz.__all__ + dicttoolz.__all__ +
+           ('countby', 'partitionby', 'map', 'filter', 'partial', 'reduce',
+            'sorted', 'comp', 'compatibility', 'dicttoolz', 'functoolz',
+            'itertoolz', 'recipes', 'sandbox', 'utils'))
+
+
+def __getattr__(name):
+    try:
+        module_name = _lazy_attrs[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r"
+                             % (__name__, name))
+    if module_name is None:
+        return import_module('.' + name, __name__)
+    attr = globals()[name] = getattr(
+        import_module('.' + module_name, __name__), name)
+    return attr
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs))
+
+
+if not PY37:  # pragma: no cover
+    for _name in _lazy_attrs:
+        __getattr__(_name)
+    del _name
 
 __version__ = '0.0.2'
@@ -8,6 +8,8 @@ builtin functions in any Python version.  This includes builtins that
 have more than one valid signature.  Currently, the registry includes
 builtins from ``builtins``, ``functools``, ``itertools``, and ``operator``
 modules.  More can be added as requested.  We don't guarantee full coverage.
+The registry is populated lazily: each builtin's signatures are expanded the
+first time that builtin is introspected, not when ``aiotoolz`` is imported.
 
 Everything in this module should be regarded as implementation details.
 Users should try to not use this module directly.
@@ -609,12 +611,20 @@ module_info['aiotoolz'] = dict(
     juxt=[
         (0, lambda *funcs: None)],
     memoize=[
-        (0, lambda func=None, cache=None, key=None: None)],
+        (0, lambda func=None, cache=None, key=None, ttl=None, name=None,
+            stale_while_revalidate=None, early_refresh=None, tags=None:
+            None)],
 )
 
 module_info['aiotoolz.functoolz'] = dict(
+    AsyncCachedProperty=[
+        (1, lambda fget, slot=None, doc=None, classval=None: None)],
+    CircuitOpen=[
+        (0, lambda *args: None)],
     Compose=[
         (0, lambda funcs: None)],
+    DeadlineExceeded=[
+        (0, lambda *args: None)],
     InstanceProperty=[
         (0, lambda fget=None, fset=None, fdel=None, doc=None,
             classval=None: None)],
@@ -701,17 +711,67 @@ def expand_sig(sig):
     return num_pos_only, func, keyword_only + keyword_exclude, sigspec
 
 
-signatures = {}
+def iter_signature_specs(module_info=module_info):
+    """ Yield ``(func, sigs)`` for the callables described in ``module_info``
 
-
-def create_signature_registry(module_info=module_info, signatures=signatures):
+    ``sigs`` are the unexpanded signature specs; see ``expand_sig``.
+    """
     for module, info in module_info.items():
         if isinstance(module, str):
             module = import_module(module)
         for name, sigs in info.items():
             if hasattr(module, name):
-                new_sigs = tuple(expand_sig(sig) for sig in sigs)
-                signatures[getattr(module, name)] = new_sigs
+                yield getattr(module, name), sigs
+
+
+class SignatureRegistry(dict):
+    """ Mapping of callables to expanded signature specs, built on demand
+
+    Nothing is done at import time.  The callables in ``module_info`` are
+    looked up the first time the registry is queried, and each signature
+    spec is expanded the first time its callable is accessed.  Expanded
+    entries are stored in the dict itself, so ``len`` and iteration only
+    show what has been used (or explicitly added) so far.
+    """
+    def __init__(self, module_info=module_info):
+        dict.__init__(self)
+        self.module_info = module_info
+        self._pending = None
+
+    @property
+    def pending(self):
+        """ Unexpanded signature specs of callables not yet accessed"""
+        if self._pending is None:
+            self._pending = dict(iter_signature_specs(self.module_info))
+        return self._pending
+
+    def __contains__(self, func):
+        return dict.__contains__(self, func) or func in self.pending
+
+    def __missing__(self, func):
+        sigs = self.pending.pop(func)
+        rv = self[func] = tuple(expand_sig(sig) for sig in sigs)
+        return rv
+
+    def __delitem__(self, func):
+        self.pending.pop(func, None)
+        dict.__delitem__(self, func)
+
+
+signatures = SignatureRegistry()
+
+
+def create_signature_registry(module_info=module_info, signatures=signatures):
+    """ Eagerly expand all signature specs in ``module_info`` into
+    ``signatures``
+
+    The default registry is populated lazily, so calling this is only needed
+    to pay the whole cost up front.
+    """
+    for func, sigs in iter_signature_specs(module_info):
+        signatures[func] = tuple(expand_sig(sig) for sig in sigs)
+    if isinstance(signatures, SignatureRegistry):
+        signatures.pending.clear()
 
 
 def check_valid(sig, args, kwargs):
@@ -0,0 +1,681 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import hashlib
+import io
+import os
+import pickle
+import sqlite3
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import functoolz
+
+
+__all__ = ('LRUCache', 'SqliteCache', 'TieredCache', 'SharedMemoryCache',
+           'aget', 'aset', 'adelete', 'acontains', 'snapshot', 'restore')
+
+
+# Async cache protocol
+# --------------------
+# ``memoize`` accepts as ``cache`` either a dict-like object or an object
+# with the coroutine methods ``aget(key)``, which raises ``KeyError`` for a
+# missing key, ``aset(key, value)`` and ``adelete(key)``, and optionally
+# ``acontains(key)``, which checks for a key without side effects such as
+# updating usage order.  The functions below apply these operations to
+# either kind of cache.
+
+async def aget(cache, key):
+    """ Get ``key`` from a dict-like or async cache
+
+    Raises ``KeyError`` if the key is missing.
+    """
+    if hasattr(cache, 'aget'):
+        return await cache.aget(key)
+    return cache[key]
+
+
+async def aset(cache, key, value):
+    """ Set ``key`` in a dict-like or async cache """
+    if hasattr(cache, 'aset'):
+        await cache.aset(key, value)
+    else:
+        cache[key] = value
+
+
+async def adelete(cache, key):
+    """ Remove ``key`` from a dict-like or async cache, if present """
+    if hasattr(cache, 'adelete'):
+        await cache.adelete(key)
+    else:
+        cache.pop(key, None)
+
+
+async def acontains(cache, key):
+    """ Is ``key`` in a dict-like or async cache?
+
+    Async caches without ``acontains`` are checked with ``aget``.
+    """
+    if hasattr(cache, 'acontains'):
+        return await cache.acontains(key)
+    if hasattr(cache, 'aget'):
+        try:
+            await cache.aget(key)
+        except KeyError:
+            return False
+        return True
+    return key in cache
+
+
+class LRUCache(MutableMapping):
+    """ A dict holding at most ``maxsize`` items
+
+    The least recently used items are evicted first.  It can be used with
+    ``memoize`` directly or as the in-process layer of a ``TieredCache``.
+
+    >>> cache = LRUCache(2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache['a']
+    1
+    >>> cache['c'] = 3
+    >>> sorted(cache)
+    ['a', 'c']
+    """
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def items(self):
+        # Iterating without ``__getitem__`` leaves the usage order unchanged
+        return self._data.items()
+
+    def values(self):
+        return self._data.values()
+
+    def __repr__(self):
+        return '%s(%d, %r)' % (type(self).__name__, self.maxsize,
+                               dict(self._data))
+
+
+class SqliteCache(object):
+    """ A cache stored in a sqlite database file
+
+    Implements the async cache protocol understood by ``memoize``.  Entries
+    survive restarts and can be shared by the processes of a host.  Keys and
+    values are serialized with ``dumps`` and ``loads`` (``pickle`` by
+    default), so equal keys must serialize to equal bytes.  By default
+    sets and dicts in keys, such as the keyword arguments in the keys of
+    ``memoize``, are pickled with sorted items, as their order otherwise
+    changes with ``PYTHONHASHSEED`` between runs.  Disk I/O runs in a
+    dedicated thread, off the event loop.
+
+    >>> cache = SqliteCache('/var/cache/app/fetch.sqlite')  # doctest: +SKIP
+    >>> fetch = await memoize(fetch, cache=cache)  # doctest: +SKIP
+
+    See Also:
+        TieredCache
+    """
+    def __init__(self, path, dumps=None, loads=None, table='cache',
+                 timeout=30):
+        self.path = path
+        self.dumps = dumps or _pickle_dumps
+        self.dumps_key = dumps or _pickle_dumps_key
+        self.loads = loads or pickle.loads
+        self.table = table
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS "%s" '
+                               '(key BLOB PRIMARY KEY, value BLOB)'
+                               % self.table)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM "%s" WHERE key = ?' % self.table,
+            (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set(self, key, value):
+        connection = self._connect()
+        connection.execute('INSERT OR REPLACE INTO "%s" (key, value) '
+                           'VALUES (?, ?)' % self.table, (key, value))
+        connection.commit()
+
+    def _contains(self, key):
+        return self._connect().execute(
+            'SELECT 1 FROM "%s" WHERE key = ?' % self.table,
+            (key,)).fetchone() is not None
+
+    def _delete(self, key):
+        connection = self._connect()
+        connection.execute('DELETE FROM "%s" WHERE key = ?' % self.table,
+                           (key,))
+        connection.commit()
+
+    def _items(self):
+        return self._connect().execute(
+            'SELECT key, value FROM "%s"' % self.table).fetchall()
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def aget(self, key):
+        value = await self._run(self._get, self.dumps_key(key))
+        if value is None:
+            raise KeyError(key)
+        return self.loads(value)
+
+    async def aset(self, key, value):
+        await self._run(self._set, self.dumps_key(key), self.dumps(value))
+
+    async def adelete(self, key):
+        await self._run(self._delete, self.dumps_key(key))
+
+    async def acontains(self, key):
+        return await self._run(self._contains, self.dumps_key(key))
+
+    async def aitems(self):
+        """ List the ``(key, value)`` pairs of the cache """
+        rows = await self._run(self._items)
+        loads = self.loads
+        return [(loads(key), loads(value)) for key, value in rows]
+
+    async def aclose(self):
+        """ Close the database connection and stop the I/O thread """
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+
+def _pickle_dumps(obj):
+    # A fixed protocol keeps the serialized keys stable across versions
+    return pickle.dumps(obj, protocol=4)
+
+
+class _Sorted(object):
+    """ Pickles as the set or dict ``type(items)`` with its items in order """
+    __slots__ = ('type', 'items')
+
+    def __init__(self, type, items):
+        self.type = type
+        self.items = items
+
+    def __reduce__(self):
+        return self.type, (self.items,)
+
+
+def _canonical(obj):
+    """ ``obj`` with the items of its sets and dicts sorted by their pickle """
+    typ = type(obj)
+    if typ is tuple:
+        return tuple(map(_canonical, obj))
+    if typ is list:
+        return list(map(_canonical, obj))
+    if typ is frozenset or typ is set:
+        return _Sorted(typ, tuple(sorted(map(_canonical, obj),
+                                         key=_pickle_fast)))
+    if typ is dict:
+        items = [(_canonical(k), _canonical(v)) for k, v in obj.items()]
+        return _Sorted(dict, tuple(sorted(items,
+                                          key=lambda kv: _pickle_fast(kv[0]))))
+    return obj
+
+
+def _pickle_fast(obj):
+    # Without the memo the bytes don't depend on which equal objects are
+    # shared within ``obj``
+    f = io.BytesIO()
+    pickler = pickle.Pickler(f, protocol=4)
+    pickler.fast = True
+    pickler.dump(obj)
+    return f.getvalue()
+
+
+def _pickle_dumps_key(key):
+    """ Pickle ``key`` to the same bytes in every process
+
+    The iteration order of sets, and so of the keyword arguments in the keys
+    of ``memoize``, depends on the hash seed of each process.
+    """
+    return _pickle_fast(_canonical(key))
+
+
+class TieredCache(object):
+    """ Layers of caches, fastest first
+
+    Lookups try each layer in turn and copy a hit into the faster layers;
+    updates go to every layer.  Layers may be dict-like objects or async
+    caches such as ``SqliteCache``.
+
+    >>> cache = TieredCache(LRUCache(10000),
+    ...                     SqliteCache('fetch.sqlite'))  # doctest: +SKIP
+    >>> fetch = await memoize(fetch, cache=cache)  # doctest: +SKIP
+
+    See Also:
+        LRUCache
+        SqliteCache
+    """
+    def __init__(self, *layers):
+        if not layers:
+            raise TypeError('TieredCache requires at least one layer')
+        self.layers = layers
+
+    async def aget(self, key):
+        layers = self.layers
+        for i, layer in enumerate(layers):
+            try:
+                value = await aget(layer, key)
+            except KeyError:
+                continue
+            for faster in layers[:i]:
+                await aset(faster, key, value)
+            return value
+        raise KeyError(key)
+
+    async def aset(self, key, value):
+        for layer in self.layers:
+            await aset(layer, key, value)
+
+    async def adelete(self, key):
+        for layer in self.layers:
+            await adelete(layer, key)
+
+    async def acontains(self, key):
+        # Unlike ``aget``, leaves the faster layers as they are
+        for layer in self.layers:
+            if await acontains(layer, key):
+                return True
+        return False
+
+
+class SharedMemoryCache(MutableMapping):
+    """ A dict-like cache in shared memory, shared by the processes of a host
+
+    Entries live in one ``multiprocessing.shared_memory`` block: a table of
+    ``slots`` hash slots in front of a ``size`` byte ring buffer holding
+    the serialized keys and values.  Memory use is fixed: the ring
+    overwrites its oldest records once full, and a key that finds no free
+    slot among the ``probes`` slots it may use replaces the least recently
+    used of them.  Values larger than a quarter of ``size`` are not stored.
+
+    Create the cache before forking workers so that they share it and its
+    lock, then use it as the cache of ``memoize``:
+
+    >>> cache = SharedMemoryCache(slots=2**16,
+    ...                           size=2**28)  # doctest: +SKIP
+    >>> fetch = await memoize(fetch, cache=cache)  # doctest: +SKIP
+
+    Other processes can attach to an existing block by ``name`` with
+    ``create=False``, passing a ``lock`` shared with its creator; only the
+    creator frees the block, with ``unlink``.  Keys and values are
+    serialized with ``dumps`` and ``loads`` (``pickle`` by default, with
+    the keys pickled as by ``SqliteCache``).  Requires Python 3.8 or later.
+
+    See Also:
+        LRUCache
+    """
+    _header = struct.Struct('<8sQQQQ')  # magic, slots, size, head, clock
+    _slot = struct.Struct('<QQQII')  # hash, last use, offset, size, key size
+    _magic = b'AIOTLZC1'
+    _data_start = 64
+
+    def __init__(self, name=None, slots=4096, size=2**24, create=True,
+                 lock=None, dumps=None, loads=None, probes=8):
+        from multiprocessing import Lock, shared_memory
+        self.dumps = dumps or _pickle_dumps
+        self.dumps_key = dumps or _pickle_dumps_key
+        self.loads = loads or pickle.loads
+        self.lock = Lock() if lock is None else lock
+        if create:
+            if slots < 1 or size < 64:
+                raise ValueError('slots must be positive and size at '
+                                 'least 64 bytes')
+            self._shm = shared_memory.SharedMemory(
+                name, create=True,
+                size=self._data_start + slots * self._slot.size + size)
+            self._buf = self._shm.buf
+            self._buf[:self._data_start + slots * self._slot.size] = bytes(
+                self._data_start + slots * self._slot.size)
+            self._header.pack_into(self._buf, 0, self._magic, slots, size,
+                                   0, 0)
+        else:
+            self._shm = _attach_shared_memory(name)
+            self._buf = self._shm.buf
+            magic, slots, size, head, clock = self._header.unpack_from(
+                self._buf, 0)
+            if magic != self._magic:
+                raise ValueError('%r is not a SharedMemoryCache' % name)
+        self.name = self._shm.name
+        self.slots = slots
+        self.size = size
+        self.probes = min(probes, slots)
+        self._store = self._data_start + slots * self._slot.size
+
+    @staticmethod
+    def _hash(data):
+        # Stable across processes, unlike ``hash`` of str and bytes
+        h = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(),
+                           'little')
+        return h or 1
+
+    def _slot_offset(self, index):
+        return self._data_start + index * self._slot.size
+
+    def _valid(self, head, offset):
+        # A record is intact until the ring has advanced a full turn past it
+        return head <= offset + self.size
+
+    def _find(self, h, kb, head):
+        """ Index and record of the slot holding ``kb``, or None """
+        buf = self._buf
+        for i in range(self.probes):
+            index = (h + i) % self.slots
+            slot_h, used, offset, size, ksize = self._slot.unpack_from(
+                buf, self._slot_offset(index))
+            if (slot_h == h and ksize == len(kb) and
+                    self._valid(head, offset)):
+                start = self._store + offset % self.size
+                if buf[start:start + ksize] == kb:
+                    return index, start, size, ksize
+        return None
+
+    def _tick(self):
+        """ Advance and return the shared access clock """
+        magic, slots, size, head, clock = self._header.unpack_from(
+            self._buf, 0)
+        clock += 1
+        self._header.pack_into(self._buf, 0, magic, slots, size, head, clock)
+        return head, clock
+
+    def __getitem__(self, key):
+        kb = self.dumps_key(key)
+        h = self._hash(kb)
+        with self.lock:
+            head, clock = self._tick()
+            found = self._find(h, kb, head)
+            if found is None:
+                raise KeyError(key)
+            index, start, size, ksize = found
+            slot_offset = self._slot_offset(index)
+            self._slot.pack_into(self._buf, slot_offset, h, clock,
+                                 *self._slot.unpack_from(
+                                     self._buf, slot_offset)[2:])
+            value = bytes(self._buf[start + ksize:start + size])
+        return self.loads(value)
+
+    def __setitem__(self, key, value):
+        kb = self.dumps_key(key)
+        record = kb + self.dumps(value)
+        if len(record) > self.size // 4:
+            return  # too large to cache without flushing everything else
+        h = self._hash(kb)
+        buf = self._buf
+        with self.lock:
+            head, clock = self._tick()
+            found = self._find(h, kb, head)
+            if found is not None:
+                index = found[0]
+            else:
+                # A free or stale slot, else the least recently used one
+                index, oldest = None, None
+                for i in range(self.probes):
+                    j = (h + i) % self.slots
+                    slot_h, used, offset, size, ksize = \
+                        self._slot.unpack_from(buf, self._slot_offset(j))
+                    if slot_h == 0 or not self._valid(head, offset):
+                        index = j
+                        break
+                    if oldest is None or used < oldest:
+                        index, oldest = j, used
+            # Append the record to the ring, skipping to its start rather
+            # than splitting the record across the end
+            position = head
+            start = position % self.size
+            if start + len(record) > self.size:
+                position += self.size - start
+                start = 0
+            buf[self._store + start:self._store + start + len(record)] = \
+                record
+            head = position + len(record)
+            magic, slots, size = self._header.unpack_from(buf, 0)[:3]
+            self._header.pack_into(buf, 0, magic, slots, size, head, clock)
+            self._slot.pack_into(buf, self._slot_offset(index), h, clock,
+                                 position, len(record), len(kb))
+
+    def __delitem__(self, key):
+        kb = self.dumps_key(key)
+        h = self._hash(kb)
+        with self.lock:
+            head = self._header.unpack_from(self._buf, 0)[3]
+            found = self._find(h, kb, head)
+            if found is None:
+                raise KeyError(key)
+            self._slot.pack_into(self._buf, self._slot_offset(found[0]),
+                                 0, 0, 0, 0, 0)
+
+    def _records(self):
+        """ Serialized ``(key, value)`` pairs of the live entries """
+        buf = self._buf
+        records = []
+        with self.lock:
+            head = self._header.unpack_from(buf, 0)[3]
+            for index in range(self.slots):
+                slot_h, used, offset, size, ksize = self._slot.unpack_from(
+                    buf, self._slot_offset(index))
+                if slot_h and self._valid(head, offset):
+                    start = self._store + offset % self.size
+                    records.append((bytes(buf[start:start + ksize]),
+                                    bytes(buf[start + ksize:start + size])))
+        return records
+
+    def __iter__(self):
+        loads = self.loads
+        return iter([loads(kb) for kb, vb in self._records()])
+
+    def __len__(self):
+        return len(self._records())
+
+    def items(self):
+        loads = self.loads
+        return [(loads(kb), loads(vb)) for kb, vb in self._records()]
+
+    def clear(self):
+        with self.lock:
+            start = self._data_start
+            end = start + self.slots * self._slot.size
+            self._buf[start:end] = bytes(end - start)
+
+    def close(self):
+        """ Detach from the shared memory block """
+        del self._buf
+        self._shm.close()
+
+    def unlink(self):
+        """ Free the shared memory block once every process has closed it """
+        self._shm.unlink()
+
+
+def _attach_shared_memory(name):
+    """ Attach to the shared memory block ``name`` without owning it
+
+    Before Python 3.13 the resource tracker of a process attaching to a
+    block unlinks it when the process exits, pulling it from under the
+    processes still using it, so the block is not registered with it.
+    """
+    from multiprocessing import shared_memory
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+_SNAPSHOT_FORMAT = ('aiotoolz.caches.snapshot', 1)
+
+
+def _resolve_names(funcs):
+    if funcs is None:
+        return None
+    names = set()
+    for func in funcs:
+        name = getattr(func, 'cache_name', func)
+        if name is None:
+            raise ValueError('%r is not registered: memoize it with a name'
+                             % func)
+        names.add(name)
+    return names
+
+
+async def snapshot(path, funcs=None, chunksize=1024):
+    """ Save the caches of memoized functions to ``path``
+
+    ``funcs`` selects memoized functions, or their names, to save; by
+    default every memoized function with a dict-like cache is saved.  The
+    cache contents are copied on the event loop and written to disk from a
+    thread.  The file is replaced atomically and entries keep their expiry
+    times.  Returns the number of entries saved.
+
+    >>> await snapshot('/var/cache/app/memoize.pickle')  # doctest: +SKIP
+
+    See Also:
+        restore
+    """
+    names = _resolve_names(funcs)
+    records = []
+    count = 0
+    for name, memof in list(functoolz._memoized.items()):
+        if names is not None and name not in names:
+            continue
+        cache = memof.cache
+        if not hasattr(cache, 'items'):  # async caches persist themselves
+            continue
+        entries = list(cache.items())
+        count += len(entries)
+        has_ttl = memof.ttl is not None
+        for i in range(0, len(entries), chunksize):
+            records.append((name, has_ttl, entries[i:i + chunksize]))
+
+    def write():
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            pickle.dump(_SNAPSHOT_FORMAT, f, protocol=4)
+            for record in records:
+                pickle.dump(record, f, protocol=4)
+        os.replace(tmp, path)
+
+    await asyncio.get_event_loop().run_in_executor(None, write)
+    return count
+
+
+def _read_record(f):
+    try:
+        return pickle.load(f)
+    except EOFError:
+        return None
+
+
+async def _aload_entries(memof, has_ttl, entries):
+    """ Write snapshot entries through to the async cache of ``memof`` """
+    cache = memof.cache
+    count = 0
+    for k, entry in functoolz._convert_entries(memof, has_ttl, entries):
+        try:
+            await cache.aget(k)
+        except KeyError:
+            await cache.aset(k, entry)
+            count += 1
+    return count
+
+
+async def restore(path, funcs=None):
+    """ Load caches saved by ``snapshot`` from ``path``
+
+    The file is read from a thread, one chunk of entries at a time, so the
+    event loop keeps serving requests while caches warm up; the restore can
+    run in the background with ``asyncio.ensure_future``.  Expired entries
+    and keys that are already cached are skipped.  Entries of functions
+    that are not memoized yet are kept until they are, except for functions
+    memoized with an async cache, which only get entries restored after
+    they are memoized: those are written through ``aset``.
+
+    ``funcs`` selects memoized functions, or their names, to restore.
+    Returns the number of entries added to caches.
+
+    See Also:
+        snapshot
+    """
+    names = _resolve_names(funcs)
+    loop = asyncio.get_event_loop()
+    f = await loop.run_in_executor(None, open, path, 'rb')
+    count = 0
+    try:
+        header = await loop.run_in_executor(None, _read_record, f)
+        if header != _SNAPSHOT_FORMAT:
+            raise ValueError('%r is not a memoize cache snapshot' % path)
+        while True:
+            record = await loop.run_in_executor(None, _read_record, f)
+            if record is None:
+                break
+            name, has_ttl, entries = record
+            if names is not None and name not in names:
+                continue
+            memof = functoolz._memoized.get(name)
+            if memof is None:
+                if has_ttl:
+                    now = time.time()
+                    entries = [(k, v) for k, v in entries if v[1] > now]
+                functoolz._restored.setdefault(name, []).append(
+                    (has_ttl, entries))
+            elif hasattr(memof.cache, 'aset'):
+                count += await _aload_entries(memof, has_ttl, entries)
+            else:
+                count += functoolz._load_entries(memof, has_ttl, entries)
+    finally:
+        f.close()
+    return count
@@ -2,11 +2,12 @@ import operator
 import sys
 from paco import map, filter
 PY3 = sys.version_info[0] == 3 and sys.version_info[1] > 4
+PY37 = sys.version_info[:2] >= (3, 7)  # module ``__getattr__`` (PEP 562)
 PYPY = hasattr(sys, 'pypy_version_info')
 
 __all__ = ('map', 'filter', 'range', 'zip', 'reduce', 'zip_longest',
            'iteritems', 'iterkeys', 'itervalues', 'filterfalse',
-           'PY3', 'PYPY', 'Sequence')
+           'PY3', 'PY37', 'PYPY', 'Sequence', 'ContextVar', 'current_task')
 
 if PY3:
     map = map
@@ -20,3 +21,36 @@ if PY3:
     iterkeys = operator.methodcaller('keys')
     itervalues = operator.methodcaller('values')
     from collections.abc import Sequence
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # pragma: no cover
+    class ContextVar(object):
+        """ Stand-in for ``contextvars.ContextVar`` before Python 3.7
+
+        Only the default value is available.  Without ``contextvars`` a
+        value can't be scoped to a task, so setting one raises instead of
+        sharing it between every task: the features relying on it, such as
+        deadlines, need Python 3.7 or later.
+        """
+        def __init__(self, name, default=None):
+            self.name = name
+            self._default = default
+
+        def get(self, *default):
+            return self._default
+
+        def set(self, value):
+            raise RuntimeError('%s requires Python 3.7 or later (contextvars)'
+                               % self.name)
+
+        def reset(self, token):
+            raise RuntimeError('%s requires Python 3.7 or later (contextvars)'
+                               % self.name)
+
+try:
+    from asyncio import current_task
+except ImportError:  # pragma: no cover
+    from asyncio import Task
+    current_task = Task.current_task
+    del Task
@@ -23,10 +23,16 @@ Example:
 See Also:
     aiotoolz.functoolz.curry
 """
-import aiotoolz
-from . import operator
+from importlib import import_module
+
+import aiotoolz as _aiotoolz
+from aiotoolz.compatibility import PY37
 from aiotoolz import (
+    add_tracer,
+    async_cached_property,
     comp,
+    compile_thread_first,
+    compile_thread_last,
     complement,
     compose,
     concat,
@@ -45,56 +51,94 @@ from aiotoolz import (
     juxt,
     last,
     memoize,
+    memoize_many,
+    memoize_stream,
     merge_sorted,
     peek,
     pipe,
+    remove_tracer,
     second,
     thread_first,
     thread_last,
+    Tracer,
 )
 from .exceptions import merge, merge_with
 
-accumulate = aiotoolz.curry(aiotoolz.accumulate)
-assoc = aiotoolz.curry(aiotoolz.assoc)
-assoc_in = aiotoolz.curry(aiotoolz.assoc_in)
-cons = aiotoolz.curry(aiotoolz.cons)
-countby = aiotoolz.curry(aiotoolz.countby)
-do = aiotoolz.curry(aiotoolz.do)
-drop = aiotoolz.curry(aiotoolz.drop)
-excepts = aiotoolz.curry(aiotoolz.excepts)
-filter = aiotoolz.curry(aiotoolz.filter)
-get = aiotoolz.curry(aiotoolz.get)
-get_in = aiotoolz.curry(aiotoolz.get_in)
-groupby = aiotoolz.curry(aiotoolz.groupby)
-interpose = aiotoolz.curry(aiotoolz.interpose)
-itemfilter = aiotoolz.curry(aiotoolz.itemfilter)
-itemmap = aiotoolz.curry(aiotoolz.itemmap)
-iterate = aiotoolz.curry(aiotoolz.iterate)
-join = aiotoolz.curry(aiotoolz.join)
-keyfilter = aiotoolz.curry(aiotoolz.keyfilter)
-keymap = aiotoolz.curry(aiotoolz.keymap)
-map = aiotoolz.curry(aiotoolz.map)
-mapcat = aiotoolz.curry(aiotoolz.mapcat)
-nth = aiotoolz.curry(aiotoolz.nth)
-partial = aiotoolz.curry(aiotoolz.partial)
-partition = aiotoolz.curry(aiotoolz.partition)
-partition_all = aiotoolz.curry(aiotoolz.partition_all)
-partitionby = aiotoolz.curry(aiotoolz.partitionby)
-pluck = aiotoolz.curry(aiotoolz.pluck)
-random_sample = aiotoolz.curry(aiotoolz.random_sample)
-reduce = aiotoolz.curry(aiotoolz.reduce)
-reduceby = aiotoolz.curry(aiotoolz.reduceby)
-remove = aiotoolz.curry(aiotoolz.remove)
-sliding_window = aiotoolz.curry(aiotoolz.sliding_window)
-sorted = aiotoolz.curry(aiotoolz.sorted)
-tail = aiotoolz.curry(aiotoolz.tail)
-take = aiotoolz.curry(aiotoolz.take)
-take_nth = aiotoolz.curry(aiotoolz.take_nth)
-topk = aiotoolz.curry(aiotoolz.topk)
-unique = aiotoolz.curry(aiotoolz.unique)
-update_in = aiotoolz.curry(aiotoolz.update_in)
-valfilter = aiotoolz.curry(aiotoolz.valfilter)
-valmap = aiotoolz.curry(aiotoolz.valmap)
+# Functions of ``aiotoolz`` that are curried on first attribute access
+_curried = frozenset([
+    'accumulate',
+    'assoc',
+    'assoc_in',
+    'batched',
+    'circuit_breaker',
+    'cons',
+    'countby',
+    'do',
+    'drop',
+    'excepts',
+    'filter',
+    'get',
+    'get_in',
+    'groupby',
+    'hedge',
+    'interpose',
+    'itemfilter',
+    'itemmap',
+    'iterate',
+    'join',
+    'keyfilter',
+    'keymap',
+    'map',
+    'mapcat',
+    'memoize_method',
+    'nth',
+    'partial',
+    'partition',
+    'partition_all',
+    'partitionby',
+    'pluck',
+    'RateLimiter',
+    'random_sample',
+    'rate_limited',
+    'reduce',
+    'reduceby',
+    'remove',
+    'retry',
+    'sliding_window',
+    'sorted',
+    'tail',
+    'take',
+    'take_nth',
+    'timed_map',
+    'topk',
+    'unique',
+    'update_in',
+    'valfilter',
+    'valmap',
+])
+
+__all__ = tuple(sorted(
+    {name for name in globals() if not name.startswith('_')}
+    - {'exceptions', 'import_module', 'PY37'} | _curried | {'operator'}
+))
+
+
+def __getattr__(name):
+    if name in _curried:
+        func = globals()[name] = _aiotoolz.curry(getattr(_aiotoolz, name))
+        return func
+    if name == 'operator':
+        return import_module('.operator', __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if not PY37:  # pragma: no cover
+    for _name in _curried | {'operator'}:
+        __getattr__(_name)
+    del _name
 
 del exceptions
-del aiotoolz
@@ -1,23 +1,40 @@
 from __future__ import absolute_import
 
-import operator
+import operator as _operator
 
-from aiotoolz.functoolz import curry, num_required_args, has_keywords
+from aiotoolz.compatibility import PY37
+from aiotoolz.functoolz import (curry as _curry,
+                                num_required_args as _num_required_args,
+                                has_keywords as _has_keywords)
 
 
-def should_curry(f):
-    num = num_required_args(f)
-    return num is None or num > 1 or num == 1 and has_keywords(f) is not False
+def _should_curry(f):
+    num = _num_required_args(f)
+    return num is None or num > 1 or num == 1 and _has_keywords(f) is not False
 
 
-locals().update(
-    {name: curry(f) if should_curry(f) else f
-     for name, f in vars(operator).items() if callable(f)},
-)
+# Functions are introspected and curried on first attribute access
+_names = frozenset(name for name, f in vars(_operator).items()
+                   if callable(f))
 
-# Clean up the namespace.
-del curry
-del num_required_args
-del has_keywords
-del operator
-del should_curry
+__all__ = tuple(sorted(name for name in _names if not name.startswith('_')))
+
+
+def __getattr__(name):
+    if name not in _names:
+        raise AttributeError("module %r has no attribute %r"
+                             % (__name__, name))
+    f = getattr(_operator, name)
+    f = globals()[name] = _curry(f) if _should_curry(f) else f
+    return f
+
+
+def __dir__():
+    return sorted(_names | {name for name in globals()
+                            if not name.startswith('_')})
+
+
+if not PY37:  # pragma: no cover
+    for _name in _names:
+        __getattr__(_name)
+    del _name
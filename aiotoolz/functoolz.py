@@ -1,19 +1,33 @@
 import asyncio
+import collections
 from functools import reduce, partial
 import inspect
+import math
 import operator
 from operator import attrgetter
+import random
+import threading
+import time
+import types
+import warnings
+import weakref
 from importlib import import_module
 from textwrap import dedent
+from types import MethodType
 
-import paco
-
-from .compatibility import PY3, PYPY
+from .compatibility import PY3, PYPY, ContextVar, current_task
 from .utils import no_default
 
 
 __all__ = ('identity', 'thread_first', 'thread_last', 'memoize', 'compose',
-           'pipe', 'complement', 'juxt', 'do', 'curry', 'flip', 'excepts')
+           'pipe', 'complement', 'juxt', 'do', 'curry', 'flip', 'excepts',
+           'hedge', 'deadline', 'time_remaining', 'timed_map',
+           'DeadlineExceeded', 'RateLimiter', 'rate_limited',
+           'circuit_breaker', 'CircuitOpen', 'retry', 'RetryBudget',
+           'batched', 'memoize_many', 'memoize_method', 'memoize_stream',
+           'tag', 'invalidate', 'async_cached_property',
+           'compile_thread_first', 'compile_thread_last', 'Tracer',
+           'add_tracer', 'remove_tracer')
 
 
 def identity(x):
@@ -25,6 +39,373 @@ def identity(x):
     return x
 
 
+class DeadlineExceeded(asyncio.TimeoutError):
+    """ Raised when work is abandoned because its deadline has passed """
+
+
+# Absolute deadline (event loop time) of the current context, and the
+# deadline already enforced by an enclosing aiotoolz combinator.
+_deadline = ContextVar('aiotoolz.deadline', default=None)
+_enforced = ContextVar('aiotoolz.deadline_enforced', default=None)
+# Whether a deadline was ever set, sparing the combinators the context
+# variable lookups until then
+_deadlines_used = False
+
+
+class deadline(object):
+    """ Set a deadline honoured by the aiotoolz async combinators
+
+    ``pipe``, ``Compose``, ``juxt``, ``thread_first``, ``thread_last`` and
+    ``timed_map`` called within the block cancel their remaining work and
+    raise ``DeadlineExceeded`` once the deadline passes.  The deadline
+    propagates through ``contextvars`` to tasks started within the block,
+    and nested deadlines can only shorten it.
+
+    >>> with deadline(0.5):  # doctest: +SKIP
+    ...     await pipe(request, fetch, parse)
+
+    Used with ``async with``, the block itself is also cancelled when the
+    deadline passes:
+
+    >>> async with deadline(0.5):  # doctest: +SKIP
+    ...     await fetch(request)
+
+    The deadline is given either as ``timeout`` seconds from now or as an
+    absolute event loop time ``at``.  Requires Python 3.7 or later.
+
+    See Also:
+        time_remaining
+        timed_map
+    """
+    def __init__(self, timeout=None, at=None):
+        if (timeout is None) == (at is None):
+            raise TypeError('deadline() takes exactly one of timeout or at')
+        self.timeout = timeout
+        self.at = at
+        self.expires = None
+        self._tokens = []
+        self._handle = None
+        self._expired = False
+
+    def __enter__(self):
+        global _deadlines_used
+        if self.at is None:
+            expires = asyncio.get_event_loop().time() + self.timeout
+        else:
+            expires = self.at
+        outer = _deadline.get()
+        if outer is not None and outer < expires:
+            expires = outer
+        self.expires = expires
+        self._tokens.append(_deadline.set(expires))
+        _deadlines_used = True
+        return self
+
+    def __exit__(self, *exc_info):
+        _deadline.reset(self._tokens.pop())
+
+    async def __aenter__(self):
+        self.__enter__()
+        loop = asyncio.get_event_loop()
+        self._expired = False
+        self._handle = loop.call_at(self.expires, self._expire,
+                                    current_task())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._handle.cancel()
+        self.__exit__(exc_type, exc, tb)
+        if exc_type is asyncio.CancelledError and self._expired:
+            raise DeadlineExceeded()
+
+    def _expire(self, task):
+        self._expired = True
+        task.cancel()
+
+
+def time_remaining():
+    """ Seconds left before the current deadline, or None without one
+
+    See Also:
+        deadline
+    """
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - asyncio.get_event_loop().time()
+
+
+async def _enforce(expires, func, args, kwargs):
+    _enforced.set(expires)
+    return await func(*args, **kwargs)
+
+
+async def _until_deadline(func, *args, **kwargs):
+    """ Run ``await func(*args, **kwargs)`` bounded by the current deadline
+
+    The call runs in its own task which is cancelled when the deadline
+    passes.  Combinators called within that task see the deadline as
+    already enforced and do not add further tasks.
+    """
+    expires = _deadline.get()
+    loop = asyncio.get_event_loop()
+    timeout = expires - loop.time()
+    if timeout <= 0:
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(
+            _enforce(expires, func, args, kwargs), timeout)
+    except asyncio.TimeoutError:
+        if loop.time() < expires:
+            raise
+        raise DeadlineExceeded()
+
+
+def _needs_deadline():
+    expires = _deadline.get()
+    return expires is not None and expires != _enforced.get()
+
+
+class Tracer(object):
+    """ Hooks called around each stage of a pipeline
+
+    Once registered with ``add_tracer``, ``start(name)`` is called before
+    each stage run by ``pipe``, ``compose``, ``juxt``, ``thread_first``,
+    ``thread_last`` and ``timed_map``, and ``end(token, name, duration,
+    error)`` after it.  ``name`` is the ``__name__`` of the stage, ``token``
+    whatever ``start`` returned, ``duration`` the time taken in seconds and
+    ``error`` the exception raised by the stage, if any.  In between,
+    ``held(token, name, duration)`` is called for each slice of time the
+    stage holds the event loop: the call of the stage function, then each
+    step of awaiting its result.  The slices of stages nested within it are
+    not included.  Stages are only timed this way for tracers overriding
+    ``held``.
+
+    >>> class SlowStages(Tracer):
+    ...     def end(self, token, name, duration, error):
+    ...         if duration > 0.1:
+    ...             print('slow stage: %s' % name)
+    >>> add_tracer(SlowStages())  # doctest: +SKIP
+
+    See Also:
+        add_tracer
+        aiotoolz.tracing.SpanTracer
+    """
+    def start(self, name):
+        pass
+
+    def held(self, token, name, duration):
+        pass
+
+    def end(self, token, name, duration, error):
+        pass
+
+
+# Registered tracers.  Stages are only traced while this is not empty.
+_tracers = []
+
+
+def add_tracer(tracer):
+    """ Call the hooks of a ``Tracer`` around every pipeline stage
+
+    Returns ``tracer``.
+
+    See Also:
+        Tracer
+        remove_tracer
+    """
+    _tracers.append(tracer)
+    return tracer
+
+
+def remove_tracer(tracer):
+    """ Stop calling the hooks of a ``Tracer`` added with ``add_tracer`` """
+    _tracers.remove(tracer)
+
+
+def _stage_name(func):
+    try:
+        return func.__name__
+    except AttributeError:
+        return type(func).__name__
+
+
+async def _traced(func, args, kwargs=None, strict=True):
+    """ Call ``func`` as a stage reported to the registered tracers
+
+    The result is awaited, or only if it is awaitable when ``strict`` is
+    false.
+    """
+    name = _stage_name(func)
+    tracers = tuple(_tracers)
+    tokens = [tracer.start(name) for tracer in tracers]
+    holding = [(tracer, token) for tracer, token in zip(tracers, tokens)
+               if type(tracer).held is not Tracer.held]
+    if holding:
+        holding = _Holding(name, holding)
+    error = None
+    start = time.perf_counter()
+    try:
+        if holding:
+            result = holding.call(func, args, kwargs)
+        else:
+            result = func(*args, **kwargs) if kwargs else func(*args)
+        if strict or inspect.isawaitable(result):
+            if holding:
+                result = await _held_steps(holding, result)
+            else:
+                result = await result
+        return result
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        for tracer, token in zip(tracers, tokens):
+            tracer.end(token, name, duration, error)
+
+
+class _Slices(threading.local):
+    """ The time nested stages held the event loop, per running stage """
+    def __init__(self):
+        self.stack = []
+
+
+_slices = _Slices()
+
+
+class _Holding(object):
+    """ Report the slices of time a stage holds the event loop to tracers
+
+    Slices are synchronous, so those of nested stages run strictly within
+    those of the stage calling them, and are not counted again for it.
+    """
+    __slots__ = ('name', 'tracers')
+
+    def __init__(self, name, tracers):
+        self.name = name
+        self.tracers = tracers
+
+    def enter(self):
+        _slices.stack.append(0.0)
+        return time.perf_counter()
+
+    def exit(self, start):
+        elapsed = time.perf_counter() - start
+        stack = _slices.stack
+        duration = elapsed - stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        for tracer, token in self.tracers:
+            tracer.held(token, self.name, duration)
+
+    def call(self, func, args, kwargs):
+        start = self.enter()
+        try:
+            return func(*args, **kwargs) if kwargs else func(*args)
+        finally:
+            self.exit(start)
+
+
+@types.coroutine
+def _held_steps(holding, awaitable):
+    """ Await ``awaitable``, timing each step of it with ``holding`` """
+    it = awaitable.__await__()
+    send, value = it.send, None
+    while True:
+        start = holding.enter()
+        try:
+            yielded = send(value)
+        except StopIteration as e:
+            return e.value
+        finally:
+            holding.exit(start)
+        try:
+            value = yield yielded
+        except GeneratorExit:
+            it.close()
+            raise
+        except BaseException as e:
+            send, value = it.throw, e
+        else:
+            send = it.send
+
+
+async def timed_map(func, seq, timeout=None, limit=0, partial=False):
+    """ Concurrently apply ``func`` to every item with per-item timeouts
+
+    Each call is cancelled if it takes longer than ``timeout`` seconds or
+    runs past the current deadline; calls that have not started by the
+    deadline are not started at all.  ``limit`` bounds the number of calls
+    in flight (``0`` for no limit).  Results keep the order of ``seq``.
+
+    >>> await timed_map(fetch, urls, timeout=1)  # doctest: +SKIP
+    [...]
+
+    By default the first timeout cancels the remaining calls and raises
+    ``asyncio.TimeoutError`` (``DeadlineExceeded`` if the deadline passed).
+    With ``partial=True`` a ``(results, timed_out)`` pair is returned
+    instead, where ``results`` holds the results of the calls that finished
+    and ``timed_out`` the inputs of those that did not.
+
+    See Also:
+        deadline
+    """
+    items = list(seq)
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(limit) if limit else None
+    timed_out = object()
+
+    async def run(item):
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            item_timeout = timeout
+            remaining = time_remaining()
+            if remaining is not None and (item_timeout is None
+                                          or remaining < item_timeout):
+                item_timeout = remaining
+            if item_timeout is not None and item_timeout <= 0:
+                raise asyncio.TimeoutError()
+            if _tracers:
+                call = _traced(func, (item,), strict=False)
+            else:
+                call = _call(func, item)
+            if item_timeout is None:
+                return await call
+            return await asyncio.wait_for(call, item_timeout)
+        except asyncio.TimeoutError:
+            if not partial:
+                raise
+            return timed_out
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        if tasks:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task.done() and task.exception() is not None:
+                exc = task.exception()
+                expires = _deadline.get()
+                if (isinstance(exc, asyncio.TimeoutError) and
+                        expires is not None and loop.time() >= expires):
+                    raise DeadlineExceeded()
+                raise exc
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    results = [task.result() for task in tasks]
+    if not partial:
+        return results
+    return ([result for result in results if result is not timed_out],
+            [item for item, result in zip(items, results)
+             if result is timed_out])
+
+
 async def thread_first(val, *forms):
     """ Thread value through a sequence of functions/forms
 
@@ -49,14 +430,7 @@ async def thread_first(val, *forms):
     See Also:
         thread_last
     """
-    async def evalform_front(val, form):
-        if callable(form):
-            return await form(val)
-        if isinstance(form, tuple):
-            func, args = form[0], form[1:]
-            args = (val,) + args
-            return await func(*args)
-    return await paco.reduce(evalform_front, forms, val)
+    return await Threaded(forms)(val)
 
 
 async def thread_last(val, *forms):
@@ -88,14 +462,117 @@ async def thread_last(val, *forms):
     See Also:
         thread_first
     """
-    async def evalform_back(val, form):
-        if callable(form):
-            return await form(val)
-        if isinstance(form, tuple):
-            func, args = form[0], form[1:]
-            args = args + (val,)
-            return await func(*args)
-    return await paco.reduce(evalform_back, forms, val)
+    return await Threaded(forms, last=True)(val)
+
+
+class Threaded(object):
+    """ A value threading through a sequence of functions/forms
+
+    The forms are analysed once, so calls run a plain loop over the stages.
+    Stages whose result is not awaitable are not awaited.
+
+    See Also:
+        compile_thread_first
+        compile_thread_last
+    """
+    __slots__ = 'stages', 'last'
+
+    def __init__(self, forms, last=False):
+        stages = []
+        for form in forms:
+            if callable(form):
+                stages.append((form, None))
+            elif isinstance(form, tuple) and form and callable(form[0]):
+                stages.append((form[0], form[1:]))
+            else:
+                raise TypeError("Expected a callable or a tuple starting "
+                                "with a callable, got %r" % (form,))
+        self.stages = tuple(stages)
+        self.last = last
+
+    async def __call__(self, val):
+        if _deadlines_used and _needs_deadline():
+            return await _until_deadline(self, val)
+        last = self.last
+        if _tracers:
+            for func, args in self.stages:
+                if args is None:
+                    args = (val,)
+                elif last:
+                    args = args + (val,)
+                else:
+                    args = (val,) + args
+                val = await _traced(func, args, strict=False)
+            return val
+        isawaitable = inspect.isawaitable
+        for func, args in self.stages:
+            if args is None:
+                val = func(val)
+            elif last:
+                val = func(*args, val)
+            else:
+                val = func(val, *args)
+            if isawaitable(val):
+                val = await val
+        return val
+
+    def __getstate__(self):
+        return self.stages, self.last
+
+    def __setstate__(self, state):
+        self.stages, self.last = state
+
+    def __repr__(self):
+        return '%s(%r, last=%r)' % (
+            type(self).__name__,
+            tuple(func if args is None else (func,) + args
+                  for func, args in self.stages),
+            self.last)
+
+    @property
+    def __name__(self):
+        try:
+            return '_then_'.join(func.__name__ for func, _ in self.stages)
+        except AttributeError:
+            return type(self).__name__
+
+
+def compile_thread_first(*forms):
+    """ Build a function threading a value through forms, as first input
+
+    ``compile_thread_first(*forms)(val)`` is equivalent to
+    ``thread_first(val, *forms)``, but the forms are analysed only once.
+
+    >>> def add(x, y): return x + y
+    >>> def pow(x, y): return x**y
+    >>> f = compile_thread_first((add, 4), (pow, 2))
+    >>> await f(1)  # pow(add(1, 4), 2)  # doctest: +SKIP
+    25
+
+    See Also:
+        thread_first
+        compile_thread_last
+    """
+    return Threaded(forms)
+
+
+def compile_thread_last(*forms):
+    """ Build a function threading a value through forms, as last input
+
+    ``compile_thread_last(*forms)(val)`` is equivalent to
+    ``thread_last(val, *forms)``, but the forms are analysed only once.
+
+    >>> def add(x, y): return x + y
+    >>> def pow(x, y): return x**y
+    >>> f = compile_thread_last((add, 4), (pow, 2))
+    >>> await f(1)  # pow(2, add(4, 1))  # doctest: +SKIP
+    32
+
+    See Also:
+        thread_last
+        compile_thread_first
+    """
+    return Threaded(forms, last=True)
 
 
 def instanceproperty(fget=None, fset=None, fdel=None, doc=None, classval=None):
@@ -147,6 +624,125 @@ class InstanceProperty(property):
         return InstanceProperty, state
 
 
+def async_cached_property(fget=None, slot=None, doc=None, classval=None):
+    """ A property computed once per object by awaiting ``fget``
+
+    Accessing the attribute returns an awaitable.  The first await calls
+    ``fget(obj)``, awaiting its result if needed, and stores the value on
+    the object.  Concurrent awaiters share the computation in progress,
+    which is not cancelled when one of them is.  Errors are not stored.
+
+    >>> class Connection(object):  # doctest: +SKIP
+    ...     @async_cached_property
+    ...     async def metadata(self):
+    ...         return await self.query('SELECT ...')
+    >>> conn = Connection()  # doctest: +SKIP
+    >>> await conn.metadata  # doctest: +SKIP
+    {...}
+
+    The value is stored in the instance ``__dict__`` under the name of
+    ``fget``, or in the attribute ``slot`` for classes with ``__slots__``.
+    Deleting the attribute resets it, and assigning it sets the value
+    future awaits return.
+    """
+    if fget is None:
+        return partial(async_cached_property, slot=slot, doc=doc,
+                       classval=classval)
+    return AsyncCachedProperty(fget, slot=slot, doc=doc, classval=classval)
+
+
+class AsyncCachedProperty(InstanceProperty):
+    """ A property computed once per object by awaiting ``fget``
+
+    Should not be used directly.  Use ``async_cached_property`` instead.
+    """
+    def __init__(self, fget, slot=None, doc=None, classval=None):
+        InstanceProperty.__init__(self, self._get, self._set, self._reset,
+                                  doc=doc or fget.__doc__, classval=classval)
+        self.func = fget
+        self.slot = slot
+        self.name = getattr(fget, '__name__', None)
+        # The computations in progress, by ``id`` of their object
+        self._in_flight = {}
+
+    def _load(self, obj):
+        if self.slot is not None:
+            return getattr(obj, self.slot)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+
+    async def _get(self, obj):
+        try:
+            return self._load(obj)
+        except AttributeError:
+            pass
+        in_flight = self._in_flight
+        ident = id(obj)
+        task = in_flight.get(ident)
+        if task is None:
+            task = in_flight[ident] = asyncio.ensure_future(
+                self._compute(obj))
+        return await asyncio.shield(task)
+
+    async def _compute(self, obj):
+        ident = id(obj)
+        try:
+            value = await _call(self.func, obj)
+        finally:
+            # The attribute may have been reset or set meanwhile
+            current = self._in_flight.get(ident) is current_task()
+            if current:
+                del self._in_flight[ident]
+        if current:
+            self._set(obj, value)
+        return value
+
+    def _set(self, obj, value):
+        self._in_flight.pop(id(obj), None)
+        if self.slot is not None:
+            setattr(obj, self.slot, value)
+        else:
+            obj.__dict__[self.name] = value
+
+    def _reset(self, obj):
+        self._in_flight.pop(id(obj), None)
+        if self.slot is not None:
+            try:
+                delattr(obj, self.slot)
+            except AttributeError:
+                pass
+        else:
+            obj.__dict__.pop(self.name, None)
+
+    def __reduce__(self):
+        return (AsyncCachedProperty,
+                (self.func, self.slot, self.__doc__, self.classval))
+
+
+class _CurryModule(str):
+    """ The ``__module__`` of ``curry``
+
+    This compares equal to the module that defines ``curry``, so the class
+    itself can be pickled and introspected as usual, while ``curry`` objects
+    report the module of the function they wrap.  Should not be used directly.
+    """
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance._module
+        except AttributeError:
+            return getattr(instance._func, '__module__', None)
+
+    def __set__(self, instance, value):
+        instance._module = value
+
+    def __reduce__(self):
+        return str, (str(self),)
+
+
 class curry(object):
     """ Curry a callable function
 
@@ -171,10 +767,21 @@ class curry(object):
     >>> add(2, 3)
     5
 
+    ``curry`` objects are slotted.  ``__name__``, ``__doc__``, ``__module__``
+    and ``__qualname__`` are read from the wrapped function unless they are
+    explicitly assigned.  Binding a curried method shares the introspection
+    results of the unbound ``curry``, so attribute access stays cheap.
+
     See Also:
         aiotoolz.curried - namespace of curried functions
                         https://toolz.readthedocs.io/en/latest/curry.html
     """
+    __slots__ = ('_func', '_args', '_keywords', '_sigspec',
+                 '_has_unknown_args', '_doc', '_name',
+                 '_module', '__dict__', '__weakref__')
+
+    __module__ = _CurryModule(__module__)
+
     def __init__(self, *args, **kwargs):
         if not args:
             raise TypeError('__init__() takes at least 2 arguments (1 given)')
@@ -197,21 +804,15 @@ class curry(object):
             args = func.args + args
             func = func.func
 
-        if kwargs:
-            self._partial = paco.partial(func, *args, **kwargs)
-        else:
-            self._partial = paco.partial(func, *args)
-
-        self.__doc__ = getattr(func, '__doc__', None)
-        self.__name__ = getattr(func, '__name__', '<curry>')
-        self.__module__ = getattr(func, '__module__', None)
-        self.__qualname__ = getattr(func, '__qualname__', None)
+        self._func = func
+        self._args = args
+        self._keywords = kwargs or None
         self._sigspec = None
         self._has_unknown_args = None
 
     @instanceproperty
     def func(self):
-        return self._partial.func
+        return self._func
 
     if PY3:  # pragma: py2 no cover
         @instanceproperty
@@ -254,11 +855,42 @@ class curry(object):
 
     @instanceproperty
     def args(self):
-        return self._partial.args
+        return self._args
 
     @instanceproperty
     def keywords(self):
-        return self._partial.keywords
+        return self._keywords or {}
+
+    def _get_doc(self):
+        try:
+            return self._doc
+        except AttributeError:
+            return getattr(self._func, '__doc__', None)
+
+    def _set_doc(self, value):
+        self._doc = value
+
+    __doc__ = instanceproperty(_get_doc, _set_doc, classval=__doc__)
+
+    def _get_name(self):
+        try:
+            return self._name
+        except AttributeError:
+            return getattr(self._func, '__name__', '<curry>')
+
+    def _set_name(self, value):
+        self._name = value
+
+    __name__ = property(_get_name, _set_name)
+
+    del _get_doc, _set_doc, _get_name, _set_name
+
+    def __getattr__(self, attr):
+        # ``__qualname__`` can't be a descriptor in the class body, so it is
+        # looked up here unless it was assigned to the instance ``__dict__``
+        if attr == '__qualname__':
+            return getattr(self._func, '__qualname__', None)
+        raise AttributeError(attr)
 
     @instanceproperty
     def func_name(self):
@@ -284,7 +916,7 @@ class curry(object):
 
     async def __call__(self, *args, **kwargs):
         try:
-            return await self._partial(*args, **kwargs)
+            return await self.call(*args, **kwargs)
         except TypeError as exc:
             if self._should_curry(args, kwargs, exc):
                 return self.bind(*args, **kwargs)
@@ -320,12 +952,25 @@ class curry(object):
         return type(self)(self, *args, **kwargs)
 
     async def call(self, *args, **kwargs):
-        return await self._partial(*args, **kwargs)
+        if self._keywords:
+            kwargs = dict(self._keywords, **kwargs)
+        result = self._func(*(self._args + args), **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
     def __get__(self, instance, owner):
         if instance is None:
             return self
-        return curry(self, instance)
+        # Bypass ``__init__``: the function is already unpacked and its
+        # introspection results can be shared with the bound curry
+        bound = object.__new__(type(self))
+        bound._func = self._func
+        bound._args = self._args + (instance,)
+        bound._keywords = self._keywords
+        bound._sigspec = self._sigspec
+        bound._has_unknown_args = self._has_unknown_args
+        return bound
 
     def __reduce__(self):
         func = self.func
@@ -350,10 +995,17 @@ class curry(object):
                 qualname = '.'.join(attrs)
                 func = '%s:%s' % (modname, qualname)
 
-        # functools.partial objects can't be pickled
-        userdict = tuple((k, v) for k, v in self.__dict__.items()
-                         if k not in ('_partial', '_sigspec'))
-        state = (type(self), func, self.args, self.keywords, userdict,
+        # Only explicitly assigned attributes are stored; the rest is
+        # derived from ``func`` again when unpickling
+        userdict = []
+        for attr, slot in (('__doc__', '_doc'), ('__name__', '_name'),
+                           ('__module__', '_module')):
+            try:
+                userdict.append((attr, getattr(self, slot)))
+            except AttributeError:
+                pass
+        userdict.extend(self.__dict__.items())
+        state = (type(self), func, self.args, self.keywords, tuple(userdict),
                  is_decorated)
         return _restore_curry, state
 
@@ -368,12 +1020,14 @@ def _restore_curry(cls, func, args, kwargs, userdict, is_decorated):
             return obj
         func = obj.func
     obj = cls(func, *args, **(kwargs or {}))
-    obj.__dict__.update(userdict)
+    for k, v in userdict:
+        setattr(obj, k, v)
     return obj
 
 
 @curry
-def memoize(func, cache=None, key=None):
+def memoize(func, cache=None, key=None, ttl=None, name=None,
+            stale_while_revalidate=None, early_refresh=None, tags=None):
     """ Cache a function's result for speedy future evaluation
 
     Considerations:
@@ -397,6 +1051,58 @@ def memoize(func, cache=None, key=None):
 
     Note that the above works as a decorator because ``memoize`` is curried.
 
+    The cache may also be asynchronous: an object with the coroutine methods
+    ``aget(key)``, raising ``KeyError`` for missing keys, and
+    ``aset(key, value)``.  With ``tags``, it should also have
+    ``acontains(key)`` so that the tags of the entries it evicts can be
+    forgotten.  ``aiotoolz.caches`` provides a persistent
+    ``SqliteCache`` and a ``TieredCache`` to put an ``LRUCache`` in front of
+    it.
+
+    >>> from aiotoolz.caches import LRUCache, SqliteCache, TieredCache
+    >>> cache = TieredCache(LRUCache(1000),
+    ...                     SqliteCache('add.sqlite'))  # doctest: +SKIP
+    >>> @memoize(cache=cache)  # doctest: +SKIP
+    ... def add(x, y):
+    ...     return x + y
+
+    With ``ttl`` results are recomputed once they are older than ``ttl``
+    seconds; the cache then holds ``(result, expiry time, compute time)``
+    triples.  Concurrent calls for a key that is being computed wait for
+    that computation rather than starting their own.
+
+    >>> @memoize(ttl=60, stale_while_revalidate=30)  # doctest: +SKIP
+    ... async def fetch(key):
+    ...     ...
+
+    With ``stale_while_revalidate`` an expired result is still returned for
+    that many seconds after expiry, while a single background call
+    refreshes it.  ``early_refresh`` (``1.0`` is a good start, larger values
+    refresh earlier) refreshes results in the background shortly before
+    they expire, with a probability that grows as expiry nears and with
+    the time the result took to compute (XFetch), so that hot keys rarely
+    expire at all.
+
+    With ``tags=True`` results can be tagged while they are computed, by
+    calling ``tag``, and evicted by tag with ``invalidate``.  ``tags`` may
+    also be a function ``tags(args, kwargs, result)`` returning tags.
+    Tags require Python 3.7 or later.
+
+    >>> def owner(args, kwargs, result):
+    ...     return [('user', result['owner'])]
+    >>> @memoize(tags=owner)  # doctest: +SKIP
+    ... async def document(doc_id):
+    ...     ...
+
+    Memoized functions are registered under ``name``, by default the
+    qualified name of ``func``, so that ``aiotoolz.caches.snapshot`` can
+    save their caches to a file and ``aiotoolz.caches.restore`` load them
+    back, for instance after a restart.  Lambdas and functions defined
+    within functions have no unique qualified name, so they are only
+    registered when given a ``name``.  Registering a name twice raises a
+    ``ValueError``.  The cache and ``ttl`` are available as attributes of
+    the memoized function.
+
     It is also possible to provide a ``key(args, kwargs)`` function that
     calculates keys used for the cache, which receives an ``args`` tuple and
     ``kwargs`` dict as input, and must return a hashable value.  However,
@@ -411,7 +1117,166 @@ def memoize(func, cache=None, key=None):
     """
     if cache is None:
         cache = {}
+    if ttl is None and (stale_while_revalidate is not None or
+                        early_refresh is not None):
+        raise ValueError('stale_while_revalidate and early_refresh require '
+                         'a ttl')
 
+    if key is None:
+        key = _memoize_key(func)
+
+    is_async = hasattr(cache, 'aget')
+    if ttl is None and not is_async and tags is None:
+        async def memof(*args, **kwargs):
+            k = key(args, kwargs)
+            try:
+                return cache[k]
+            except TypeError:
+                raise TypeError("Arguments to memoized function must be "
+                                "hashable")
+            except KeyError:
+                cache[k] = result = await func(*args, **kwargs)
+                return result
+    else:
+        # Computations in flight, by key: concurrent misses and refreshes
+        # of a key share a single call to ``func``
+        in_flight = {}
+
+        # Tags of the cached entries, by key, and the size of ``entry_tags``
+        # at which it is next pruned of the entries no longer cached
+        entry_tags = {}
+        prune_at = [64]
+
+        async def compute(k, args, kwargs):
+            started = time.time()
+            if tags is None:
+                result = await func(*args, **kwargs)
+            else:
+                generation = _invalidations[0]
+                _computing[generation] = _computing.get(generation, 0) + 1
+                collected = []
+                token = _collected_tags.set(collected)
+                try:
+                    try:
+                        result = await func(*args, **kwargs)
+                    finally:
+                        _collected_tags.reset(token)
+                    if callable(tags):
+                        collected.extend(tags(args, kwargs, result))
+                    collected = frozenset(collected)
+                    if any(_invalidated.get(t, -1) > generation
+                           for t in collected):
+                        return result  # invalidated while computing
+                finally:
+                    _done_computing(generation)
+            if ttl is None:
+                entry = result
+            else:
+                now = time.time()
+                entry = (result, now + ttl, now - started)
+            if is_async:
+                await cache.aset(k, entry)
+            else:
+                cache[k] = entry
+            if tags is not None:
+                _tag_entries(tag_ref, entry_tags, k, collected)
+                if len(entry_tags) >= prune_at[0]:
+                    _prune_tags(tag_ref, entry_tags, cache, prune_at)
+            return result
+
+        def refresh(k, args, kwargs):
+            task = in_flight.get(k)
+            if task is None:
+                task = in_flight[k] = asyncio.ensure_future(
+                    compute(k, args, kwargs))
+
+                def done(task):
+                    if in_flight.get(k) is task:
+                        del in_flight[k]
+                    if not task.cancelled():
+                        task.exception()  # retrieved for background calls
+
+                task.add_done_callback(done)
+            return task
+
+        async def memof(*args, **kwargs):
+            k = key(args, kwargs)
+            try:
+                entry = (await cache.aget(k)) if is_async else cache[k]
+            except TypeError:
+                raise TypeError("Arguments to memoized function must be "
+                                "hashable")
+            except KeyError:
+                pass
+            else:
+                if tags is not None and k in entry_tags:
+                    # Callers being memoized with tags depend on this entry
+                    outer = _collected_tags.get()
+                    if outer is not None:
+                        outer.extend(entry_tags[k])
+                if ttl is None:
+                    return entry
+                result, expires, delta = entry
+                now = time.time()
+                if now < expires:
+                    # XFetch: refresh early with a probability growing as
+                    # expiry nears, scaled by the time computing took
+                    if early_refresh and (
+                            now - delta * early_refresh *
+                            math.log(1.0 - random.random()) >= expires):
+                        refresh(k, args, kwargs)
+                    return result
+                if (stale_while_revalidate is not None and
+                        now < expires + stale_while_revalidate):
+                    refresh(k, args, kwargs)
+                    return result
+            return await asyncio.shield(refresh(k, args, kwargs))
+
+    try:
+        memof.__name__ = func.__name__
+    except AttributeError:
+        pass
+    memof.__doc__ = func.__doc__
+    memof.__wrapped__ = func
+    memof.cache = cache
+    memof.ttl = ttl
+    if tags is not None:
+        memof.entry_tags = entry_tags
+        # Shared by the pairs of ``_tagged``, which are dropped with ``memof``
+        tag_ref = weakref.ref(memof, partial(_untag_entries, entry_tags))
+    if name is None:
+        name = _registry_name(func)
+    memof.cache_name = name
+    if name is None:
+        return memof
+    if name in _memoized:
+        raise ValueError('A memoized function is already registered as %r; '
+                         'give memoize a different name' % name)
+    _memoized[name] = memof
+    restored = _restored.pop(name, None)
+    if restored is not None:
+        if is_async:
+            warnings.warn('Restored cache entries of %s are dropped: they '
+                          'can only be written to an async cache by '
+                          'restoring after memoizing' % name, RuntimeWarning)
+        else:
+            for has_ttl, entries in restored:
+                _load_entries(memof, has_ttl, entries)
+    return memof
+
+
+def _registry_name(func):
+    """ The qualified name of ``func``, or None if it may not be unique """
+    modname = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+    if not modname or not qualname or '<' in qualname:
+        # Lambdas and ``<locals>`` of functions share their qualified names
+        return None
+    return '%s.%s' % (modname, qualname)
+
+
+def _memoize_key(func):
+    """ The default ``key(args, kwargs)`` function of ``memoize`` """
     try:
         may_have_kwargs = has_keywords(func) is not False
         # Is unary function (single arg, no variadic argument or keywords)?
@@ -420,29 +1285,471 @@ def memoize(func, cache=None, key=None):
         may_have_kwargs = True
         is_unary = False
 
+    if is_unary:
+        def key(args, kwargs):
+            return args[0]
+    elif may_have_kwargs:
+        def key(args, kwargs):
+            return (
+                args or None,
+                frozenset(kwargs.items()) if kwargs else None,
+            )
+    else:
+        def key(args, kwargs):
+            return args
+    return key
+
+
+# Memoized functions by ``cache_name``, and cache entries restored by
+# ``aiotoolz.caches.restore`` before their function was memoized
+_memoized = weakref.WeakValueDictionary()
+_restored = {}
+
+# Tags collected by the memoized computation of the current context, the
+# cached entries of each tag as ``(weakref to memoized function, key)``
+# pairs, the number of tagged computations in flight by the generation they
+# started in, and the generation of the last invalidation of each tag, kept
+# while computations started before it are in flight
+_collected_tags = ContextVar('aiotoolz.memoize_tags', default=None)
+_tagged = {}
+_computing = {}
+_invalidated = {}
+_invalidations = [0]
+
+
+def _tag_entries(ref, entry_tags, k, collected):
+    old = entry_tags.get(k)
+    if old:
+        _untag_entry(ref, entry_tags, k, old - collected)
+    entry_tags[k] = collected
+    if collected:
+        for t in collected:
+            _tagged.setdefault(t, set()).add((ref, k))
+        outer = _collected_tags.get()
+        if outer is not None:
+            outer.extend(collected)
+
+
+def _untag_entry(ref, entry_tags, k, tags=None):
+    """ Remove ``tags`` of entry ``k`` from the index, or all its tags """
+    if tags is None:
+        tags = entry_tags.pop(k, ())
+    for t in tags:
+        pairs = _tagged.get(t)
+        if pairs is not None:
+            pairs.discard((ref, k))
+            if not pairs:
+                del _tagged[t]
+
+
+def _untag_entries(entry_tags, ref):
+    for k in list(entry_tags):
+        _untag_entry(ref, entry_tags, k)
+
+
+def _prune_tags(ref, entry_tags, cache, prune_at):
+    """ Untag the entries evicted from ``cache`` or expired out of it
+
+    Caches don't report evictions, so the tagged entries are looked up
+    once ``entry_tags`` doubles past the entries found cached last time.
+    Dict-like caches are checked with ``in``, which leaves the order of an
+    ``LRUCache`` unchanged.  Async caches are checked with ``acontains`` in
+    a background task, and aren't pruned without it.
+    """
+    if not hasattr(cache, 'aget'):
+        for k in [k for k in entry_tags if k not in cache]:
+            _untag_entry(ref, entry_tags, k)
+        prune_at[0] = 2 * len(entry_tags) + 64
+    elif hasattr(cache, 'acontains'):
+        prune_at[0] = float('inf')  # until this pruning is done
+        task = asyncio.ensure_future(
+            _aprune_tags(ref, entry_tags, cache, prune_at))
+        _pruning.add(task)
+        task.add_done_callback(_pruned)
+    else:
+        prune_at[0] = float('inf')
+
+
+async def _aprune_tags(ref, entry_tags, cache, prune_at):
+    try:
+        for k in list(entry_tags):
+            tags = entry_tags.get(k)
+            if tags is None or await cache.acontains(k):
+                continue
+            if entry_tags.get(k) is tags:  # not cached again meanwhile
+                _untag_entry(ref, entry_tags, k)
+    finally:
+        prune_at[0] = 2 * len(entry_tags) + 64
+
+
+# Background prunings of the tags of async caches
+_pruning = set()
+
+
+def _pruned(task):
+    _pruning.discard(task)
+    if not task.cancelled():
+        task.exception()  # retrieved: the tags are pruned again later
+
+
+def _done_computing(generation):
+    count = _computing[generation] - 1
+    if count:
+        _computing[generation] = count
+        return
+    del _computing[generation]
+    if not _computing:
+        _invalidated.clear()
+    elif generation < min(_computing):
+        # Invalidations up to the oldest computation left no longer matter
+        oldest = min(_computing)
+        for t in [t for t, g in _invalidated.items() if g <= oldest]:
+            del _invalidated[t]
+
+
+def tag(*tags):
+    """ Tag the result being computed by a memoized function
+
+    Tagged results can be evicted from the caches of all memoized functions
+    at once with ``invalidate``.  Memoized functions must opt into tagging
+    with ``memoize(..., tags=True)``; results that depend on other tagged
+    results, by calling a memoized function with tags, inherit their tags.
+
+    >>> @memoize(tags=True)  # doctest: +SKIP
+    ... async def profile(user_id):
+    ...     tag(('user', user_id))
+    ...     return await db.fetch_profile(user_id)
+
+    Calls outside of a memoized computation are ignored.
+
+    See Also:
+        invalidate
+        memoize
+    """
+    collected = _collected_tags.get()
+    if collected is not None:
+        collected.extend(tags)
+
+
+async def invalidate(*tags):
+    """ Evict the memoized results tagged with any of ``tags``
+
+    Takes time proportional to the number of results evicted.  Results
+    being computed when their tag is invalidated are returned but not
+    cached.  Returns the number of evicted results, which for async caches
+    may include results they had evicted already.
+
+    >>> await invalidate(('user', 42))  # doctest: +SKIP
+
+    See Also:
+        tag
+    """
+    _invalidations[0] += 1
+    generation = _invalidations[0]
+    count = 0
+    for t in tags:
+        if _computing:
+            _invalidated[t] = generation
+        for ref, k in _tagged.pop(t, ()):
+            memof = ref()
+            if memof is None:
+                continue
+            entry_tags = memof.entry_tags
+            if t not in entry_tags.get(k, ()):
+                continue  # recomputed since, without this tag
+            _untag_entry(ref, entry_tags, k)
+            cache = memof.cache
+            if hasattr(cache, 'adelete'):
+                await cache.adelete(k)
+            elif cache.pop(k, no_default) is no_default:
+                continue  # evicted already
+            count += 1
+    return count
+
+
+def _convert_entries(memof, has_ttl, entries):
+    """ Snapshot entries in the layout of the cache of a memoized function
+
+    Expired entries are skipped.
+    """
+    ttl = memof.ttl
+    now = time.time()
+    for k, entry in entries:
+        if has_ttl:
+            if entry[1] <= now:
+                continue
+            if ttl is None:
+                entry = entry[0]
+        elif ttl is not None:
+            entry = (entry, now + ttl, 0)
+        yield k, entry
+
+
+def _load_entries(memof, has_ttl, entries):
+    """ Add snapshot entries to the dict-like cache of a memoized function
+
+    Expired entries and keys already cached are skipped.  Returns the
+    number of entries added.
+    """
+    cache = memof.cache
+    count = 0
+    for k, entry in _convert_entries(memof, has_ttl, entries):
+        if k not in cache:
+            cache[k] = entry
+            count += 1
+    return count
+
+
+class memoize_method(object):
+    """ Memoize a method with a separate cache for each instance
+
+    Unlike ``memoize`` applied to a method, which keys a single cache on
+    ``self`` and so keeps every instance alive, each instance gets its own
+    cache, released together with the instance.  Concurrent calls with the
+    same arguments on an instance share a single call.
+
+    >>> class Connection(object):  # doctest: +SKIP
+    ...     @memoize_method
+    ...     async def table_schema(self, name):
+    ...         return await self.query('DESCRIBE %s' % name)
+
+    ``key(args, kwargs)`` computes cache keys from the arguments other than
+    ``self``, as in ``memoize``.  With ``weak_keys=True`` the method must
+    take a single argument, which the cache references weakly: entries are
+    dropped when their argument is garbage collected.
+
+    Instances must support weak references, which classes with
+    ``__slots__`` do if they include ``'__weakref__'``.  ``cache(instance)``
+    returns the cache of an instance.
+
+    See Also:
+        memoize
+    """
+    def __init__(self, func, key=None, weak_keys=False):
+        self.func = self.__wrapped__ = func
+        self.weak_keys = weak_keys
+        try:
+            is_unary = is_arity(2, func)
+        except TypeError:  # pragma: no cover
+            is_unary = False
+        if weak_keys and not is_unary:
+            raise TypeError('weak_keys requires a method of one argument')
+        if key is None:
+            if is_unary:
+                def key(args, kwargs):
+                    return args[0]
+            else:
+                def key(args, kwargs):
+                    return (
+                        args or None,
+                        frozenset(kwargs.items()) if kwargs else None,
+                    )
+        self.key = key
+        # Caches and computations in flight of live instances, by ``id``
+        self._state = {}
+
+    def _get_state(self, instance):
+        i = id(instance)
+        state = self._state.get(i)
+        if state is None or state[0]() is not instance:
+            def release(ref):
+                if self._state.get(i, (None,))[0] is ref:
+                    del self._state[i]
+
+            cache = weakref.WeakKeyDictionary() if self.weak_keys else {}
+            state = self._state[i] = (weakref.ref(instance, release),
+                                      cache, {})
+        return state
+
+    def cache(self, instance):
+        """ The cache of ``instance`` """
+        return self._get_state(instance)[1]
+
+    async def _call(self, instance, *args, **kwargs):
+        ref, cache, in_flight = self._get_state(instance)
+        k = self.key(args, kwargs)
+        try:
+            return cache[k]
+        except TypeError:
+            raise TypeError("Arguments to memoized function must be "
+                            "hashable")
+        except KeyError:
+            pass
+        task = in_flight.get(k)
+        if task is None:
+            task = in_flight[k] = asyncio.ensure_future(
+                self._compute(instance, cache, k, args, kwargs))
+
+            def done(task):
+                if in_flight.get(k) is task:
+                    del in_flight[k]
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    async def _compute(self, instance, cache, k, args, kwargs):
+        result = await _call(self.func, instance, *args, **kwargs)
+        cache[k] = result
+        return result
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return MethodType(self._call, instance)
+
+    @property
+    def __name__(self):
+        return getattr(self.func, '__name__', 'memoize_method')
+
+    @instanceproperty(classval=__doc__)
+    def __doc__(self):
+        return getattr(self.func, '__doc__', None)
+
+
+@curry
+def memoize_many(func, cache=None, key=None):
+    """ Cache the results of a function of many keys, key by key
+
+    ``func`` takes a list of items and returns a list of results in the
+    same order.  The memoized function caches each result separately and
+    calls ``func`` only with the items missing from the cache, so that
+    overlapping lists share cached results.
+
+    >>> async def fetch_many(ids):  # doctest: +SKIP
+    ...     return [await fetch(i) for i in ids]
+    >>> fetch_many = await memoize_many(fetch_many)  # doctest: +SKIP
+    >>> await fetch_many([1, 2, 3])  # doctest: +SKIP
+    >>> await fetch_many([2, 3, 4])  # calls fetch_many([4])  # doctest: +SKIP
+
+    Items already being computed by a concurrent call are not requested
+    again; their results are awaited instead.  The ``cache`` and
+    ``key(item)`` arguments are as in ``memoize``; by default items are
+    their own keys.  As with ``memoize``, the cache is available as the
+    ``cache`` attribute of the memoized function.
+
+    See Also:
+        memoize
+        batched
+    """
+    if cache is None:
+        cache = {}
     if key is None:
-        if is_unary:
-            def key(args, kwargs):
-                return args[0]
-        elif may_have_kwargs:
-            def key(args, kwargs):
-                return (
-                    args or None,
-                    frozenset(kwargs.items()) if kwargs else None,
-                )
-        else:
-            def key(args, kwargs):
-                return args
+        key = identity
+    # Computations in flight, by the keys they compute
+    in_flight = {}
+
+    async def compute(items, keys):
+        results = list(await _call(func, items))
+        if len(results) != len(items):
+            raise ValueError('%s returned %d results for %d items'
+                             % (getattr(func, '__name__', 'func'),
+                                len(results), len(items)))
+        computed = dict(zip(keys, results))
+        cache.update(computed)
+        return computed
+
+    def done(task):
+        for k, t in list(in_flight.items()):
+            if t is task:
+                del in_flight[k]
+        if not task.cancelled():
+            task.exception()  # retrieved even if every caller went away
+
+    async def memof(items):
+        items = list(items)
+        keys = [key(item) for item in items]
+        results = {}
+        missing_items = []
+        missing_keys = []
+        tasks = []
+        for item, k in zip(items, keys):
+            try:
+                if k in results:
+                    continue
+                results[k] = cache[k]
+                continue
+            except TypeError:
+                raise TypeError("Arguments to memoized function must be "
+                                "hashable")
+            except KeyError:
+                pass
+            task = in_flight.get(k)
+            if task is None:
+                missing_items.append(item)
+                missing_keys.append(k)
+            elif task not in tasks:
+                tasks.append(task)
+            results[k] = no_default
+        if missing_items:
+            task = asyncio.ensure_future(compute(missing_items, missing_keys))
+            for k in missing_keys:
+                in_flight[k] = task
+            task.add_done_callback(done)
+            tasks.append(task)
+        for task in tasks:
+            computed = await asyncio.shield(task)
+            for k in computed:
+                if k in results:
+                    results[k] = computed[k]
+        return [results[k] for k in keys]
 
-    async def memof(*args, **kwargs):
+    try:
+        memof.__name__ = func.__name__
+    except AttributeError:
+        pass
+    memof.__doc__ = func.__doc__
+    memof.__wrapped__ = func
+    memof.cache = cache
+    return memof
+
+
+@curry
+def memoize_stream(func, cache=None, key=None, max_items=None):
+    """ Memoize a function returning an iterator or async iterator
+
+    ``memoize`` would cache the iterator itself, which is exhausted after
+    its first use.  Instead the memoized function returns an async iterator
+    replaying the items produced by a single call to ``func``: items are
+    cached as they are produced, concurrent consumers share the production
+    in progress and later consumers replay the cached items.
+
+    >>> def pages(url):  # doctest: +SKIP
+    ...     return PageIterator(url)  # fetches one page per item
+    >>> pages = await memoize_stream(pages, max_items=1000)  # doctest: +SKIP
+    >>> async for page in pages(url):  # doctest: +SKIP
+    ...     print(page)
+
+    ``func`` may return an iterator, an async iterator or an awaitable of
+    either; it is called when the first item is requested.  A production
+    that fails is not cached: its consumers receive the error and later
+    calls start afresh.  Once a production exceeds ``max_items`` it is
+    removed from the cache and its items are only kept until its current
+    consumers have read them.  ``cache`` and ``key`` are as in ``memoize``.
+
+    See Also:
+        memoize
+    """
+    if cache is None:
+        cache = {}
+    if key is None:
+        key = _memoize_key(func)
+
+    def memof(*args, **kwargs):
         k = key(args, kwargs)
         try:
-            return cache[k]
+            production = cache[k]
         except TypeError:
             raise TypeError("Arguments to memoized function must be hashable")
         except KeyError:
-            cache[k] = result = await func(*args, **kwargs)
-            return result
+            def evict(production):
+                if cache.get(k) is production:
+                    del cache[k]
+
+            production = cache[k] = _Production(
+                func, args, kwargs, max_items, evict)
+        return production.replay()
 
     try:
         memof.__name__ = func.__name__
@@ -450,9 +1757,131 @@ def memoize(func, cache=None, key=None):
         pass
     memof.__doc__ = func.__doc__
     memof.__wrapped__ = func
+    memof.cache = cache
     return memof
 
 
+class _Production(object):
+    """ The items produced by one call of a ``memoize_stream`` function """
+    def __init__(self, func, args, kwargs, max_items, evict):
+        self.items = []
+        self.offset = 0  # number of items dropped past ``max_items``
+        self.done = False
+        self.error = None
+        self.max_items = max_items
+        self.consumers = weakref.WeakSet()
+        self._request = (func, args, kwargs)
+        self._evict = evict
+        self._source = None
+        self._is_async = False
+        self._pull = None
+
+    def replay(self):
+        replay = _Replay(self)
+        if self.max_items is not None:
+            self.consumers.add(replay)
+        return replay
+
+    async def advance(self):
+        """ Produce the next item, sharing the work between consumers """
+        if self._source is not None and not self._is_async:
+            self._produce(self._next_sync)
+            return
+        if self._pull is None:
+            self._pull = asyncio.ensure_future(self._next_async())
+
+            def done(task):
+                self._pull = None
+
+            self._pull.add_done_callback(done)
+        await asyncio.shield(self._pull)
+
+    def _next_sync(self):
+        return next(self._source)
+
+    async def _next_async(self):
+        if self._source is None:
+            func, args, kwargs = self._request
+            try:
+                source = await _call(func, *args, **kwargs)
+            except Exception as e:
+                self._fail(e)
+                return
+            if hasattr(source, '__aiter__'):
+                self._source = source.__aiter__()
+                self._is_async = True
+            else:
+                self._source = iter(source)
+                self._produce(self._next_sync)
+                return
+        try:
+            item = await self._source.__anext__()
+        except StopAsyncIteration:
+            self._finish()
+        except Exception as e:
+            self._fail(e)
+        else:
+            self._append(item)
+
+    def _produce(self, next_item):
+        try:
+            item = next_item()
+        except StopIteration:
+            self._finish()
+        except Exception as e:
+            self._fail(e)
+        else:
+            self._append(item)
+
+    def _append(self, item):
+        items = self.items
+        items.append(item)
+        if self.max_items is None:
+            return
+        if self.offset + len(items) > self.max_items:
+            self._evict(self)
+            # Keep only the items some consumer has yet to read
+            low = min((c.index for c in self.consumers),
+                      default=self.offset + len(items))
+            if low > self.offset:
+                del items[:low - self.offset]
+                self.offset = low
+
+    def _finish(self):
+        self.done = True
+        self._source = self._request = None
+
+    def _fail(self, error):
+        self._finish()
+        self.error = error
+        self._evict(self)
+
+
+class _Replay(object):
+    """ An async iterator over the items of a ``_Production`` """
+    __slots__ = ('production', 'index', '__weakref__')
+
+    def __init__(self, production):
+        self.production = production
+        self.index = production.offset
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        production = self.production
+        while True:
+            i = self.index - production.offset
+            if i < len(production.items):
+                self.index += 1
+                return production.items[i]
+            if production.done:
+                if production.error is not None:
+                    raise production.error
+                raise StopAsyncIteration
+            await production.advance()
+
+
 class Compose(object):
     """ A composition of functions
 
@@ -467,6 +1896,13 @@ class Compose(object):
         self.funcs = funcs[1:]
 
     async def __call__(self, *args, **kwargs):
+        if _deadlines_used and _needs_deadline():
+            return await _until_deadline(self, *args, **kwargs)
+        if _tracers:
+            ret = await _traced(self.first, args, kwargs)
+            for f in self.funcs:
+                ret = await _traced(f, (ret,))
+            return ret
         ret = await self.first(*args, **kwargs)
         for f in self.funcs:
             ret = await f(ret)
@@ -552,6 +1988,12 @@ async def pipe(data, *funcs):
         thread_first
         thread_last
     """
+    if _deadlines_used and _needs_deadline():
+        return await _until_deadline(pipe, data, *funcs)
+    if _tracers:
+        for func in funcs:
+            data = await _traced(func, (data,))
+        return data
     for func in funcs:
         data = await func(data)
     return data
@@ -597,7 +2039,13 @@ class juxt(object):
         self.funcs = tuple(funcs)
 
     async def __call__(self, *args, **kwargs):
+        if _deadlines_used and _needs_deadline():
+            return await _until_deadline(self, *args, **kwargs)
         retval = list()
+        if _tracers:
+            for func in self.funcs:
+                retval.append(await _traced(func, args, kwargs))
+            return tuple(retval)
         for func in self.funcs:
             retval.append(await func(*args, **kwargs))
         return tuple(retval)
@@ -709,15 +2157,9 @@ class excepts(object):
 
     async def __call__(self, *args, **kwargs):
         try:
-            if asyncio.iscoroutine(self.func):
-                return await self.func(*args, **kwargs)
-            else:
-                return self.func(*args, **kwargs)
+            return await _call(self.func, *args, **kwargs)
         except self.exc as e:
-            if asyncio.iscoroutine(self.handler):
-                return await self.handler(e)
-            else:
-                return self.handler(e)
+            return await _call(self.handler, e)
 
     @instanceproperty(classval=__doc__)
     def __doc__(self):
@@ -762,6 +2204,530 @@ class excepts(object):
             return 'excepting'
 
 
+class batched(object):
+    """ Collect individual calls into calls to ``batch_func``
+
+    Calls made within the same event loop iteration, or within ``max_wait``
+    seconds of the first one, are gathered and ``batch_func`` is called
+    once with the list of their arguments.  It must return a list of
+    results in the same order; each caller receives its own result.  A
+    result that is an exception instance is raised to its caller only.
+
+    >>> async def fetch_many(ids):  # doctest: +SKIP
+    ...     rows = await db.fetch('SELECT * FROM t WHERE id = ANY($1)', ids)
+    ...     by_id = {row['id']: row for row in rows}
+    ...     return [by_id.get(i) for i in ids]
+    >>> fetch = batched(fetch_many, max_batch_size=100)  # doctest: +SKIP
+    >>> await juxt(fetch, fetch)(1)  # doctest: +SKIP
+
+    Batches hold at most ``max_batch_size`` arguments (``None`` for no
+    limit), and equal arguments within a batch are passed only once.
+    Combine with ``memoize`` to also skip arguments seen before:
+
+    >>> fetch = await memoize(batched(fetch_many))  # doctest: +SKIP
+
+    See Also:
+        memoize
+    """
+    def __init__(self, batch_func, max_batch_size=None, max_wait=0):
+        self.batch_func = batch_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = []
+        self._handle = None
+
+    async def __call__(self, arg):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._queue.append((arg, future))
+        if (self.max_batch_size is not None and
+                len(self._queue) >= self.max_batch_size):
+            self._dispatch()
+        elif self._handle is None:
+            if self.max_wait:
+                self._handle = loop.call_later(self.max_wait, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        queue, self._queue = self._queue, []
+        asyncio.ensure_future(self._run(queue))
+
+    async def _run(self, queue):
+        args = []
+        try:
+            index = {}
+            for arg, future in queue:
+                if arg not in index:
+                    index[arg] = len(args)
+                    args.append(arg)
+            positions = [index[arg] for arg, future in queue]
+        except TypeError:  # unhashable arguments are passed as they are
+            args = [arg for arg, future in queue]
+            positions = range(len(queue))
+        try:
+            results = await _call(self.batch_func, args)
+            results = list(results)
+            if len(results) != len(args):
+                raise ValueError(
+                    '%s returned %d results for %d arguments'
+                    % (getattr(self.batch_func, '__name__', 'batch_func'),
+                       len(results), len(args)))
+        except Exception as e:
+            for arg, future in queue:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (arg, future), position in zip(queue, positions):
+            if future.done():  # the caller was cancelled
+                continue
+            result = results[position]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @property
+    def __name__(self):
+        try:
+            return 'batched_%s' % self.batch_func.__name__
+        except AttributeError:
+            return 'batched'
+
+    @instanceproperty(classval=__doc__)
+    def __doc__(self):
+        return getattr(self.batch_func, '__doc__', None)
+
+
+class RetryBudget(object):
+    """ Cap the retries of several functions to a fraction of their calls
+
+    Every call deposits ``ratio`` tokens and every retry withdraws one, so
+    that once the initial ``reserve`` is spent, retries are limited to
+    ``ratio`` of calls.  This keeps a struggling backend from receiving a
+    storm of retries on top of its regular load.
+
+    >>> budget = RetryBudget(ratio=0.1)  # doctest: +SKIP
+    >>> fetch = retry(fetch, budget=budget)  # doctest: +SKIP
+    >>> store = retry(store, budget=budget)  # doctest: +SKIP
+
+    See Also:
+        retry
+    """
+    def __init__(self, ratio=0.1, reserve=10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+
+    def deposit(self):
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """ Take a token for a retry, return whether one was available """
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class retry(object):
+    """ Retry ``func`` when it raises ``exc``
+
+    ``func`` is called up to ``max_attempts`` times.  Between attempts the
+    call sleeps for a random time between zero and an exponentially growing
+    bound, ``backoff * 2 ** n`` capped at ``max_backoff`` (full jitter), so
+    that concurrent callers spread out their retries.  The last exception is
+    raised once the attempts, the shared ``budget`` (a ``RetryBudget``) or
+    the time left before the current ``deadline`` run out.
+
+    >>> fetch = retry(fetch, exc=ConnectionError,
+    ...               max_attempts=5)  # doctest: +SKIP
+
+    Functions that are not safe to call twice can be marked with
+    ``idempotent=False``; they are called only once.  Combined with
+    ``curry`` this gives a policy to apply to many functions:
+
+    >>> policy = curry(retry, exc=ConnectionError,
+    ...                budget=RetryBudget())  # doctest: +SKIP
+    >>> fetch = await policy(fetch)  # doctest: +SKIP
+    >>> store = await policy(store, idempotent=False)  # doctest: +SKIP
+
+    Wrap the result in ``excepts`` to handle the final failure, and in
+    ``memoize`` to cache successes:
+
+    >>> fetch = await memoize(excepts(ConnectionError, retry(fetch),
+    ...                               lambda e: None))  # doctest: +SKIP
+
+    See Also:
+        excepts
+        RetryBudget
+    """
+    def __init__(self, func, exc=Exception, max_attempts=3, backoff=0.1,
+                 max_backoff=10.0, budget=None, idempotent=True):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.func = func
+        self.exc = exc
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.idempotent = idempotent
+
+    async def __call__(self, *args, **kwargs):
+        budget = self.budget
+        if budget is not None:
+            budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                return await _call(self.func, *args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except self.exc:
+                if not self.idempotent or attempt >= self.max_attempts:
+                    raise
+                delay = random.uniform(0, min(
+                    self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+                remaining = time_remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
+                if budget is not None and not budget.withdraw():
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @property
+    def __name__(self):
+        try:
+            return 'retrying_%s' % self.func.__name__
+        except AttributeError:
+            return 'retrying'
+
+    @instanceproperty(classval=__doc__)
+    def __doc__(self):
+        return getattr(self.func, '__doc__', None)
+
+
+class CircuitOpen(Exception):
+    """ Raised by a ``circuit_breaker`` that is refusing calls """
+
+
+class circuit_breaker(object):
+    """ Fail fast while ``func`` keeps failing
+
+    After ``failure_threshold`` consecutive failures (exceptions matching
+    ``exc``) the circuit opens: calls are refused without calling ``func``
+    for ``reset_timeout`` seconds.  Refused calls raise ``CircuitOpen`` or,
+    like ``excepts``, are routed to ``handler`` which receives the
+    ``CircuitOpen`` exception.
+
+    Once ``reset_timeout`` has passed the circuit is half open and lets up
+    to ``half_open_max`` concurrent calls through to probe ``func``.  A
+    successful probe closes the circuit, a failed one opens it again.
+
+    >>> breaker = circuit_breaker(fetch, failure_threshold=5,
+    ...                           reset_timeout=30)  # doctest: +SKIP
+    >>> cached = circuit_breaker(fetch, handler=lambda e: None,
+    ...                          exc=ConnectionError)  # doctest: +SKIP
+
+    See Also:
+        excepts
+    """
+    def __init__(self, func, failure_threshold=5, reset_timeout=30,
+                 half_open_max=1, exc=Exception, handler=None):
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be at least 1')
+        if half_open_max < 1:
+            raise ValueError('half_open_max must be at least 1')
+        self.func = func
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self.exc = exc
+        self.handler = handler
+        self.failures = 0
+        self.opened_at = None
+        self._probes = 0
+
+    @property
+    def state(self):
+        """ One of ``'closed'``, ``'open'`` or ``'half_open'`` """
+        if self.opened_at is None:
+            return 'closed'
+        now = asyncio.get_event_loop().time()
+        if now - self.opened_at < self.reset_timeout:
+            return 'open'
+        return 'half_open'
+
+    def reset(self):
+        """ Close the circuit """
+        self.failures = 0
+        self.opened_at = None
+
+    async def __call__(self, *args, **kwargs):
+        state = self.state
+        if state == 'open' or (state == 'half_open' and
+                               self._probes >= self.half_open_max):
+            error = CircuitOpen('%s is failing, not calling it'
+                                % self.__name__)
+            if self.handler is None:
+                raise error
+            return await _call(self.handler, error)
+
+        probing = state == 'half_open'
+        if probing:
+            self._probes += 1
+        try:
+            result = await _call(self.func, *args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except self.exc:
+            self.failures += 1
+            if probing or self.failures >= self.failure_threshold:
+                self.opened_at = asyncio.get_event_loop().time()
+            raise
+        finally:
+            if probing:
+                self._probes -= 1
+        self.reset()
+        return result
+
+    @property
+    def __name__(self):
+        try:
+            return 'circuit_breaker_%s' % self.func.__name__
+        except AttributeError:
+            return 'circuit_breaker'
+
+    @instanceproperty(classval=__doc__)
+    def __doc__(self):
+        return getattr(self.func, '__doc__', None)
+
+
+async def _call(func, *args, **kwargs):
+    """ Call ``func`` and await the result if it is awaitable """
+    result = func(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class hedge(object):
+    """ Hedge calls to ``func`` against a slow tail of latencies
+
+    If a call has not finished after ``delay`` seconds, a duplicate call is
+    launched, up to ``max_extra`` duplicates per call.  The first successful
+    result is returned and the remaining calls are cancelled.  An exception
+    is raised only once every launched call has failed.
+
+    >>> fetch = hedge(fetch_replica, delay=0.05, max_extra=2)  # doctest: +SKIP
+    >>> await fetch('key')  # doctest: +SKIP
+
+    With ``delay=None`` (the default) the delay adapts to the ``quantile``
+    (95th percentile by default) of the latencies of the last ``window``
+    successful calls.  Until ``min_samples`` latencies have been observed,
+    no duplicate calls are made.
+
+    Only hedge idempotent functions: every duplicate may run to completion
+    (or until cancelled) and have side effects.
+
+    See Also:
+        excepts
+    """
+    def __init__(self, func, delay=None, max_extra=1, quantile=0.95,
+                 window=128, min_samples=16):
+        if not 0 < quantile <= 1:
+            raise ValueError('quantile must be in (0, 1]')
+        if max_extra < 0:
+            raise ValueError('max_extra must be non-negative')
+        self.func = func
+        self.delay = delay
+        self.max_extra = max_extra
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.latencies = collections.deque(maxlen=window)
+        self._adaptive_delay = None
+        self._pending_samples = 0
+
+    @property
+    def current_delay(self):
+        """ Seconds to wait before launching a duplicate, or None """
+        if self.delay is not None:
+            return self.delay
+        if self._pending_samples:
+            # Sorting the window on every call would dominate fast functions,
+            # so the quantile is refreshed every few observations.
+            latencies = self.latencies
+            if (len(latencies) >= self.min_samples
+                    and (self._adaptive_delay is None
+                         or self._pending_samples >= 8)):
+                ordered = sorted(latencies)
+                index = int(self.quantile * (len(ordered) - 1) + 0.5)
+                self._adaptive_delay = ordered[index]
+                self._pending_samples = 0
+        return self._adaptive_delay
+
+    async def __call__(self, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        delay = self.current_delay
+        extra = self.max_extra if delay is not None else 0
+        started = {}
+
+        def retrieve(task):
+            if not task.cancelled():
+                task.exception()  # retrieved for calls that lost the race
+
+        def launch():
+            task = asyncio.ensure_future(_call(self.func, *args, **kwargs))
+            task.add_done_callback(retrieve)
+            started[task] = loop.time()
+            return task
+
+        pending = {launch()}
+        next_launch = loop.time() + delay if extra else None
+        try:
+            while True:
+                timeout = None
+                if extra:
+                    timeout = max(0, next_launch - loop.time())
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        self.latencies.append(loop.time() - started[task])
+                        self._pending_samples += 1
+                        return task.result()
+                if not pending:
+                    # Every call failed: surface the last failure
+                    return task.result()
+                if extra and loop.time() >= next_launch:
+                    pending.add(launch())
+                    extra -= 1
+                    next_launch += delay
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @property
+    def __name__(self):
+        try:
+            return 'hedged_%s' % self.func.__name__
+        except AttributeError:
+            return 'hedged'
+
+    @instanceproperty(classval=__doc__)
+    def __doc__(self):
+        return getattr(self.func, '__doc__', None)
+
+
+class RateLimiter(object):
+    """ A token bucket shared by any number of rate limited functions
+
+    Tokens accrue at ``rate`` per second up to ``burst``.  Each call to
+    ``acquire`` takes one token, sleeping on the event loop clock until one
+    is available; waiters are served in the order they arrived.
+
+    >>> limiter = RateLimiter(10, burst=5)  # doctest: +SKIP
+    >>> fetch = rate_limited(fetch, limiter)  # doctest: +SKIP
+    >>> store = rate_limited(store, limiter)  # doctest: +SKIP
+
+    The limiter is also an async context manager:
+
+    >>> async with limiter:  # doctest: +SKIP
+    ...     await fetch(url)
+
+    See Also:
+        rate_limited
+    """
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = None
+
+    def _refill(self, now):
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self):
+        """ Tokens available now; negative while callers are waiting """
+        self._refill(asyncio.get_event_loop().time())
+        return self._tokens
+
+    async def acquire(self):
+        """ Take a token, waiting until one is available """
+        loop = asyncio.get_event_loop()
+        self._refill(loop.time())
+        # Reserve the token up front: the balance goes negative while
+        # callers wait, so each waiter sleeps exactly once, until its turn.
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self._tokens / self.rate)
+        except asyncio.CancelledError:
+            self._refill(loop.time())
+            self._tokens += 1
+            raise
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+class rate_limited(object):
+    """ Limit the rate of calls to ``func``
+
+    Calls are paced to ``rate`` per second, allowing bursts of up to
+    ``burst`` calls, by waiting on a token bucket rather than failing.
+    Pass a ``RateLimiter`` instead of a rate to share one budget across
+    several functions.
+
+    >>> fetch = rate_limited(fetch, 100, burst=10)  # doctest: +SKIP
+    >>> await map(fetch, urls)  # doctest: +SKIP
+
+    See Also:
+        RateLimiter
+    """
+    def __init__(self, func, rate, burst=1):
+        self.func = func
+        if isinstance(rate, RateLimiter):
+            self.limiter = rate
+        else:
+            self.limiter = RateLimiter(rate, burst)
+
+    async def __call__(self, *args, **kwargs):
+        await self.limiter.acquire()
+        return await _call(self.func, *args, **kwargs)
+
+    @property
+    def __name__(self):
+        try:
+            return 'rate_limited_%s' % self.func.__name__
+        except AttributeError:
+            return 'rate_limited'
+
+    @instanceproperty(classval=__doc__)
+    def __doc__(self):
+        return getattr(self.func, '__doc__', None)
+
+
 if PY3:
     def _check_sigspec(sigspec, func, builtin_func, *builtin_args):
         if sigspec is None:
@@ -981,4 +2947,17 @@ def is_arity(n, func, sigspec=None):
     return True
 
 
-from . import _signatures as _sigs
+class _LazySignatures(object):
+    """ Stand-in for ``aiotoolz._signatures`` until it is first used
+
+    The registry of builtin signatures is only needed for introspection, so
+    it is imported on first attribute access, which also rebinds ``_sigs``.
+    """
+    def __getattr__(self, attr):
+        global _sigs
+        from . import _signatures
+        _sigs = _signatures
+        return getattr(_signatures, attr)
+
+
+_sigs = _LazySignatures()
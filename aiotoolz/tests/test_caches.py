@@ -0,0 +1,363 @@
+import gc
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+
+import aiotoolz
+from aiotoolz import memoize
+from aiotoolz.caches import (LRUCache, SqliteCache, TieredCache,
+                             SharedMemoryCache, aget, aset, acontains, snapshot,
+                             restore)
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache['a'] == 1
+    cache['c'] = 3
+    assert 'b' not in cache
+    assert sorted(cache) == ['a', 'c']
+    del cache['a']
+    assert len(cache) == 1
+    assert cache.get('a') is None
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache(tmpdir):
+    path = str(tmpdir.join('cache.sqlite'))
+    cache = SqliteCache(path)
+    with pytest.raises(KeyError):
+        await cache.aget((1, 2))
+    await cache.aset((1, 2), {'x': [3]})
+    await cache.aset('none', None)
+    assert await cache.aget((1, 2)) == {'x': [3]}
+    assert await cache.aget('none') is None
+    await cache.adelete('none')
+    assert await cache.aitems() == [((1, 2), {'x': [3]})]
+    await cache.aclose()
+
+    # Entries survive reopening the file
+    cache = SqliteCache(path)
+    assert await cache.aget((1, 2)) == {'x': [3]}
+    await cache.aclose()
+
+    import json
+    cache = SqliteCache(path, dumps=lambda x: json.dumps(x).encode(),
+                        loads=json.loads, table='json')
+    await cache.aset('a', [1])
+    assert await cache.aget('a') == [1]
+    await cache.aclose()
+
+
+def _run_with_hash_seed(seed, code, *args):
+    """ Output of ``code`` run in a new interpreter with the given seed """
+    path = os.path.dirname(os.path.dirname(os.path.abspath(aiotoolz.__file__)))
+    env = dict(os.environ, PYTHONHASHSEED=str(seed),
+               PYTHONPATH=os.pathsep.join(
+                   [path, os.environ.get('PYTHONPATH', '')]))
+    return subprocess.check_output([sys.executable, '-c', code] +
+                                   list(args), env=env)
+
+
+# A key of ``memoize`` for a call with keyword arguments
+_kwargs_key = ("(None, frozenset(dict(alpha=1, beta=2, gamma=3, delta=4, "
+               "epsilon=5).items()))")
+
+_sqlite_script = """
+import asyncio, sys
+from aiotoolz.caches import SqliteCache
+
+async def main(path, write):
+    cache = SqliteCache(path)
+    key = %s
+    if write:
+        await cache.aset(key, 'cached')
+    else:
+        print(await cache.aget(key))
+    await cache.aclose()
+
+asyncio.get_event_loop().run_until_complete(main(sys.argv[1],
+                                                 sys.argv[2] == 'write'))
+""" % _kwargs_key
+
+
+def test_sqlite_cache_keys_across_processes(tmpdir):
+    # Keys with keyword arguments are found again by processes with
+    # another hash seed, after a restart
+    path = str(tmpdir.join('cache.sqlite'))
+    _run_with_hash_seed(1, _sqlite_script, path, 'write')
+    for seed in range(2, 7):
+        assert _run_with_hash_seed(seed, _sqlite_script, path,
+                                   'read').strip() == b'cached'
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache(tmpdir):
+    front = LRUCache(10)
+    back = SqliteCache(str(tmpdir.join('cache.sqlite')))
+    cache = TieredCache(front, back)
+    await cache.aset('a', 1)
+    assert front['a'] == 1
+    assert await back.aget('a') == 1
+
+    front.clear()
+    # Membership checks don't copy entries into the faster layers
+    assert await cache.acontains('a')
+    assert 'a' not in front
+    assert await cache.aget('a') == 1
+    assert front['a'] == 1
+    await cache.adelete('a')
+    assert not await back.acontains('a')
+    assert not await acontains(cache, 'a')
+    with pytest.raises(KeyError):
+        await cache.aget('a')
+    with pytest.raises(TypeError):
+        TieredCache()
+    await back.aclose()
+
+
+@pytest.mark.asyncio
+async def test_memoize_async_cache(tmpdir):
+    calls = []
+
+    async def inc(x):
+        calls.append(x)
+        return x + 1
+
+    path = str(tmpdir.join('cache.sqlite'))
+    back = SqliteCache(path)
+    memo = await memoize(inc, cache=TieredCache(LRUCache(), back))
+    assert await memo(1) == 2
+    assert await memo(1) == 2
+    assert calls == [1]
+    await back.aclose()
+
+    # A new process would find the result on disk
+    back = SqliteCache(path)
+    memo = await memoize(inc, cache=TieredCache(LRUCache(), back))
+    assert await memo(1) == 2
+    assert calls == [1]
+    await back.aclose()
+
+
+@pytest.mark.asyncio
+async def test_protocol_helpers():
+    d = {}
+    await aset(d, 'a', 1)
+    assert await aget(d, 'a') == 1
+    cache = TieredCache(d)
+    assert await aget(cache, 'a') == 1
+    with pytest.raises(KeyError):
+        await aget(cache, 'b')
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restore(tmpdir):
+    path = str(tmpdir.join('snapshot.pickle'))
+
+    async def inc(x):
+        return x + 1
+
+    async def double(x):
+        return x * 2
+
+    memo_inc = await memoize(inc, name='test_snapshot.inc', ttl=60)
+    memo_double = await memoize(double, name='test_snapshot.double',
+                                cache=LRUCache(10))
+    for i in range(3):
+        await memo_inc(i)
+        await memo_double(i)
+    memo_inc.cache['expired'] = ('stale', 0, 0)
+
+    assert await snapshot(path, [memo_inc, 'test_snapshot.double']) == 7
+
+    memo_inc.cache.clear()
+    memo_double.cache.clear()
+    memo_double.cache[0] = 'newer'
+    assert await restore(path) == 5
+    assert sorted(memo_inc.cache) == [0, 1, 2]
+    assert memo_inc.cache[1][0] == 2
+    assert memo_inc.cache[1][1] > 0
+    assert dict(memo_double.cache.items()) == {0: 'newer', 1: 2, 2: 4}
+
+    # Functions memoized after the restore pick up their entries
+    memo_late = await memoize(inc, name='test_snapshot.late', ttl=60)
+    await memo_late(5)
+    await snapshot(path, [memo_late])
+    del memo_late
+    gc.collect()
+    assert await restore(path, ['test_snapshot.late']) == 0
+    memo_late = await memoize(inc, name='test_snapshot.late')
+    assert memo_late.cache == {5: 6}
+
+    # Async caches get restored entries written through, once memoized
+    memo_sync = await memoize(inc, name='test_snapshot.async', ttl=60)
+    await memo_sync(7)
+    await snapshot(path, [memo_sync])
+    del memo_sync
+    gc.collect()
+    memo_async = await memoize(inc, name='test_snapshot.async', ttl=60,
+                               cache=TieredCache({}))
+    assert await restore(path) == 1
+    assert (await aget(memo_async.cache, 7))[0] == 8
+    assert await restore(path) == 0
+    del memo_async
+    gc.collect()
+    assert await restore(path) == 0
+    with pytest.warns(RuntimeWarning):
+        await memoize(inc, name='test_snapshot.async', cache=TieredCache({}))
+
+    with open(path, 'wb') as f:
+        f.write(b'')
+    with pytest.raises(ValueError):
+        await restore(path)
+
+
+async def _add(x, y):
+    return x + y
+
+_lambda_inc = lambda x: _add(x, 1)  # noqa: E731
+_lambda_double = lambda x: _add(x, x)  # noqa: E731
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restore_anonymous(tmpdir):
+    path = str(tmpdir.join('snapshot.pickle'))
+
+    # Both lambdas are named ``test_caches.<lambda>``, so they aren't
+    # registered and their entries can't be restored into each other
+    inc = await memoize(_lambda_inc)
+    double = await memoize(_lambda_double)
+    assert inc.cache_name is None
+    assert await inc(5) == 6
+    assert await double(5) == 10
+    with pytest.raises(ValueError):
+        await snapshot(path, [inc])
+
+    inc = await memoize(_lambda_inc, name='test_snapshot.lambda_inc')
+    await inc(5)
+    with pytest.raises(ValueError):
+        await memoize(_lambda_double, name='test_snapshot.lambda_inc')
+    await snapshot(path, [inc])
+    inc.cache.clear()
+    assert await restore(path) == 1
+    assert await inc(5) == 6
+
+
+def test_shared_memory_cache():
+    pytest.importorskip('multiprocessing.shared_memory')
+    cache = SharedMemoryCache(slots=16, size=1024)
+    try:
+        cache['a'] = 1
+        cache[(1, 2)] = {'b': [3]}
+        assert cache['a'] == 1
+        assert cache[(1, 2)] == {'b': [3]}
+        assert len(cache) == 2
+        assert sorted(cache.items(), key=str) == [('a', 1),
+                                                  ((1, 2), {'b': [3]})]
+        cache['a'] = 2
+        assert cache['a'] == 2
+        assert len(cache) == 2
+        del cache['a']
+        assert 'a' not in cache
+        with pytest.raises(KeyError):
+            del cache['a']
+
+        # Other processes attach by name and see the same entries
+        other = SharedMemoryCache(cache.name, create=False, lock=cache.lock)
+        assert other[(1, 2)] == {'b': [3]}
+        other['c'] = 'd'
+        assert cache['c'] == 'd'
+        other.close()
+
+        if sys.platform != 'win32':
+            # Forked workers share the cache and its lock
+            worker = multiprocessing.get_context('fork').Process(
+                target=cache.__setitem__, args=('pid', 'child'))
+            worker.start()
+            worker.join()
+            assert cache['pid'] == 'child'
+
+        # Values too large for the ring are not stored
+        cache['big'] = b'x' * 1024
+        assert 'big' not in cache
+        cache.clear()
+        assert len(cache) == 0
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+_shared_memory_script = """
+import sys
+from aiotoolz.caches import SharedMemoryCache
+
+cache = SharedMemoryCache(sys.argv[1], create=False)
+print(cache[%s])
+cache.close()
+""" % _kwargs_key
+
+
+def test_shared_memory_cache_across_processes():
+    pytest.importorskip('multiprocessing.shared_memory')
+    cache = SharedMemoryCache(slots=16, size=1024)
+    try:
+        cache[eval(_kwargs_key)] = 'cached'
+        # Processes attaching by name find keys with keyword arguments
+        # whatever their hash seed, and leave the block in place on exit
+        for seed in range(1, 6):
+            assert _run_with_hash_seed(seed, _shared_memory_script,
+                                       cache.name).strip() == b'cached'
+        other = SharedMemoryCache(cache.name, create=False)
+        other.close()
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_shared_memory_cache_eviction():
+    pytest.importorskip('multiprocessing.shared_memory')
+    cache = SharedMemoryCache(slots=4, size=256, probes=4)
+    try:
+        for i in range(4):
+            cache[i] = i
+        cache[0]  # recently used
+        cache[4] = 4
+        assert 0 in cache
+        assert 4 in cache
+        assert len(cache) == 4
+
+        # The ring overwrites the oldest records once full
+        for i in range(100):
+            cache[i % 2] = bytes(40)
+        assert len(cache) <= 4
+        assert cache[1] == bytes(40)
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+@pytest.mark.asyncio
+async def test_shared_memory_cache_memoize():
+    pytest.importorskip('multiprocessing.shared_memory')
+    calls = []
+
+    async def inc(x):
+        calls.append(x)
+        return x + 1
+
+    cache = SharedMemoryCache(slots=64, size=4096)
+    try:
+        memo = await memoize(inc, cache=cache)
+        assert await memo(1) == 2
+        assert await memo(1) == 2
+        assert calls == [1]
+    finally:
+        cache.close()
+        cache.unlink()
@@ -2,6 +2,8 @@ import aiotoolz
 import aiotoolz.curried
 from aiotoolz.curried import (take, first, second, sorted, merge_with, reduce,
                            merge, operator as cop)
+import subprocess
+import sys
 from collections import defaultdict
 from importlib import import_module
 from operator import add
@@ -42,7 +44,8 @@ def test_module_name():
 
 
 def test_curried_operator():
-    for k, v in vars(cop).items():
+    for k in dir(cop):
+        v = getattr(cop, k)
         if not callable(v):
             continue
 
@@ -62,7 +65,7 @@ def test_curried_operator():
                 )
 
     # Make sure this isn't totally empty.
-    assert len(set(vars(cop)) & {'add', 'sub', 'mul'}) == 3
+    assert len(set(dir(cop)) & {'add', 'sub', 'mul'}) == 3
 
 
 def test_curried_namespace():
@@ -84,12 +87,16 @@ def test_curried_namespace():
             for name, f in ns.items() if '__' not in name
         }
 
-    from_toolz = curry_namespace(vars(aiotoolz))
+    def module_namespace(module):
+        return {name: getattr(module, name) for name in dir(module)}
+
+    from_toolz = curry_namespace(module_namespace(aiotoolz))
     from_exceptions = curry_namespace(vars(exceptions))
     namespace.update(aiotoolz.merge(from_toolz, from_exceptions))
 
     namespace = aiotoolz.valfilter(callable, namespace)
-    curried_namespace = aiotoolz.valfilter(callable, aiotoolz.curried.__dict__)
+    curried_namespace = aiotoolz.valfilter(
+        callable, module_namespace(aiotoolz.curried))
 
     if namespace != curried_namespace:
         missing = set(namespace) - set(curried_namespace)
@@ -111,3 +118,38 @@ def test_curried_namespace():
             else:
                 messages.append('%s should come from aiotoolz and NOT be curried' % name)
         raise AssertionError('\n'.join(messages))
+
+
+def test_lazy_namespaces():
+    code = '\n'.join([
+        'import sys',
+        'import aiotoolz.curried',
+        'import aiotoolz.curried.operator as cop',
+        'print(sorted(name for name in ("aiotoolz.recipes",',
+        '                               "aiotoolz.sandbox",',
+        '                               "aiotoolz._signatures")',
+        '             if name in sys.modules))',
+        'print("take" in vars(aiotoolz.curried), "add" in vars(cop))',
+        'print(aiotoolz.curried.take is aiotoolz.curried.take)',
+        'print("take" in vars(aiotoolz.curried), "add" in dir(cop))',
+    ])
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.decode().split('\n')[:4] == [
+        '[]', 'False False', 'True', 'True True',
+    ]
+
+
+def test_star_import():
+    namespace = {}
+    exec('from aiotoolz.curried import *', namespace)
+    assert isinstance(namespace['take'], aiotoolz.curry)
+    assert namespace['countby'] is aiotoolz.curried.countby
+    assert namespace['operator'] is cop
+    assert 'exceptions' not in namespace
+
+    namespace = {}
+    exec('from aiotoolz import *', namespace)
+    assert namespace['countby'] is aiotoolz.recipes.countby
+    for name in ['compatibility', 'dicttoolz', 'functoolz', 'itertoolz',
+                 'recipes', 'sandbox', 'utils']:
+        assert namespace[name] is getattr(aiotoolz, name)
@@ -1,11 +1,22 @@
+import asyncio
+import copy
+import gc
 import platform
+import time
 
 import paco
 import pytest
 
 from aiotoolz.functoolz import (thread_first, thread_last, memoize, curry,
                                 compose, pipe, complement, do, juxt, flip,
-                                excepts)
+                                excepts, hedge, deadline, time_remaining,
+                                timed_map, DeadlineExceeded, RateLimiter,
+                                rate_limited, circuit_breaker, CircuitOpen,
+                                retry, RetryBudget, batched, memoize_many,
+                                memoize_method, memoize_stream, tag,
+                                invalidate, async_cached_property,
+                                compile_thread_first, compile_thread_last,
+                                Tracer, add_tracer, remove_tracer)
 from operator import add, mul, itemgetter
 from aiotoolz.utils import raises
 from functools import partial
@@ -43,6 +54,29 @@ async def test_thread_last():
     assert await thread_last(2, (add, 5), double) == 14
 
 
+@pytest.mark.asyncio
+async def test_compile_thread():
+    async def aadd(x, y):
+        return x + y
+
+    f = compile_thread_first(double, (aadd, 5), (pow, 2), str)
+    assert await f(1) == '49'
+    assert await f(2) == '81'
+    assert f.__name__ == 'double_then_aadd_then_pow_then_str'
+    g = compile_thread_last((map, lambda x: x + 1),
+                            (filter, lambda x: x % 2 == 0), list)
+    assert await g([1, 2, 3]) == [2, 4]
+    assert await compile_thread_last((pow, 2))(3) == 8
+    assert await compile_thread_first()(1) == 1
+    assert await thread_first(1, (pow, 2), (aadd, 1)) == 2
+    assert await thread_last(1, (pow, 2), (aadd, 1)) == 3
+
+    with pytest.raises(TypeError):
+        compile_thread_first(1)
+    with pytest.raises(TypeError):
+        compile_thread_last(())
+
+
 @pytest.mark.asyncio
 async def test_memoize():
     fn_calls = [0]  # Storage for side effects
@@ -56,7 +90,8 @@ async def test_memoize():
     assert await mf(2, 3) is await mf(2, 3)
     assert fn_calls == [1]  # function was only called once
     assert mf.__doc__ == f.__doc__
-    assert raises(TypeError, lambda: await mf(1, {}))
+    with pytest.raises(TypeError):
+        await mf(1, {})
 
 
 @pytest.mark.asyncio
@@ -400,6 +435,64 @@ def test_curry_on_classmethods():
     assert isinstance(A.addmethod, curry)
 
 
+@pytest.mark.asyncio
+async def test_curry_bound_methods():
+    class A(object):
+        def __init__(self, base):
+            self.base = base
+
+        @curry
+        async def addmethod(self, x, y):
+            return self.base + x + y
+
+    a = A(100)
+    assert await a.addmethod(3, 4) == 107
+    assert await (await a.addmethod(3))(4) == 107
+    # Binding leaves no trace on the instance
+    assert vars(a) == {'base': 100}
+
+    b = copy.copy(a)
+    b.base = 200
+    assert b.addmethod is not a.addmethod
+    assert await b.addmethod(3, 4) == 207
+    assert await a.addmethod(3, 4) == 107
+
+
+@pytest.mark.asyncio
+async def test_curry_bound_methods_prebound_args():
+    async def tagged(prefix, obj, x):
+        return (prefix, obj.name, x)
+
+    class mycurry(curry):
+        pass
+
+    class A(object):
+        name = 'a'
+        method = curry(tagged, 'pre')
+        submethod = mycurry(tagged, 'sub')
+
+    a = A()
+    # The instance follows the arguments bound already, as with toolz
+    assert await a.method(1) == ('pre', 'a', 1)
+    assert isinstance(a.submethod, mycurry)
+    assert await a.submethod(2) == ('sub', 'a', 2)
+
+
+def test_curry_slots():
+    def foo(a, b, c=1):
+        """ foo docstring """
+        return a + b + c
+
+    f = curry(foo, 1)
+    assert f.__name__ == 'foo'
+    assert f.__doc__ == foo.__doc__
+    assert f.__module__ == foo.__module__
+    assert f.__qualname__ == foo.__qualname__
+    assert curry.__module__ == 'aiotoolz.functoolz'
+    assert curry.__name__ == 'curry'
+    assert 'Curry a callable function' in curry.__doc__
+
+
 def test_memoize_on_classmethods():
     class A(object):
         BASE = 10
@@ -656,3 +749,1080 @@ def test_excepts():
     assert excepting.__name__ == 'excepting'
     assert excepting.__doc__ == excepts.__doc__
 
+
+
+@pytest.mark.asyncio
+async def test_hedge():
+    calls = []
+
+    async def fetch(x):
+        calls.append(x)
+        # The first call is slow, duplicates answer immediately
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return x + len(calls)
+
+    hedged = hedge(fetch, delay=0.01, max_extra=2)
+    assert hedged.__name__ == 'hedged_fetch'
+    assert await hedged(10) == 12
+    assert len(calls) == 2
+    assert len(hedged.latencies) == 1
+
+    # Fast calls are never duplicated
+    del calls[:]
+    calls.append(None)
+    assert await hedged(10) == 12
+    assert calls == [None, 10]
+
+
+@pytest.mark.asyncio
+async def test_hedge_cancels_losers():
+    cancelled = []
+
+    async def slow(x):
+        try:
+            await asyncio.sleep(x)
+        except asyncio.CancelledError:
+            cancelled.append(x)
+            raise
+        return x
+
+    delays = iter([1, 1, 0])
+    hedged = hedge(lambda: slow(next(delays)), delay=0.01, max_extra=2)
+    assert await hedged() == 0
+    await asyncio.sleep(0)
+    assert cancelled == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_hedge_failures():
+    attempts = []
+
+    async def flaky():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise ValueError('first')
+        await asyncio.sleep(0.05)
+        return 'ok'
+
+    # A failure does not trigger a duplicate by itself
+    hedged = hedge(flaky, delay=1)
+    with pytest.raises(ValueError):
+        await hedged()
+    assert len(attempts) == 1
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise KeyError('broken')
+
+    with pytest.raises(KeyError):
+        await hedge(broken, delay=0.001, max_extra=3)()
+    with pytest.raises(ValueError):
+        hedge(broken, quantile=0)
+
+
+@pytest.mark.asyncio
+async def test_hedge_retrieves_losing_failures():
+    loop = asyncio.get_event_loop()
+    errors = []
+    handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    try:
+        for i in range(20):
+            released = asyncio.Event()
+            attempts = []
+
+            async def racing():
+                attempts.append(None)
+                if len(attempts) == 1:
+                    # Fails in the same loop iteration the duplicate wins
+                    await released.wait()
+                    raise ValueError('lost')
+                released.set()
+                return 'ok'
+
+            assert await hedge(racing, delay=0.001)() == 'ok'
+            await asyncio.sleep(0)
+            del racing, attempts
+            gc.collect()
+    finally:
+        loop.set_exception_handler(handler)
+    assert errors == []
+
+
+@pytest.mark.asyncio
+async def test_hedge_adaptive_delay():
+    hedged = hedge(lambda x: x, min_samples=4, quantile=0.5)
+    assert hedged.current_delay is None
+    for i in range(3):
+        assert await hedged(i) == i
+    assert hedged.current_delay is None
+    hedged.latencies.clear()
+    hedged.latencies.extend([0.4, 0.1, 0.3, 0.2])
+    hedged._pending_samples += 4
+    assert hedged.current_delay == 0.3
+    assert hedge(lambda x: x, delay=0.5).current_delay == 0.5
+
+
+@pytest.mark.asyncio
+async def test_deadline():
+    assert time_remaining() is None
+    with deadline(10) as d:
+        assert 9 < time_remaining() <= 10
+        with deadline(20) as inner:
+            # Nested deadlines can only shorten the outer one
+            assert inner.expires == d.expires
+        with deadline(1):
+            assert time_remaining() <= 1
+        assert time_remaining() > 1
+    assert time_remaining() is None
+    with pytest.raises(TypeError):
+        deadline()
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_pipe():
+    reached = []
+
+    async def slow(x):
+        await asyncio.sleep(1)
+        return x
+
+    async def record(x):
+        reached.append(x)
+        return x
+
+    async def inc(x):
+        return x + 1
+
+    with deadline(1):
+        assert await pipe(1, inc, record) == 2
+        assert await compose(record, inc)(1) == 2
+        assert await juxt(inc, record)(1) == (2, 1)
+        assert await thread_first(1, inc, record) == 2
+        assert await thread_last(1, inc, record) == 2
+
+    for call in [lambda: pipe(1, slow, record),
+                 lambda: compose(record, slow)(1),
+                 lambda: juxt(slow, record)(1),
+                 lambda: thread_first(1, slow, record),
+                 lambda: thread_last(1, slow, record)]:
+        del reached[:]
+        with deadline(0.01):
+            with pytest.raises(DeadlineExceeded):
+                await call()
+        assert reached == []
+
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            await pipe(1, record)
+    assert reached == []
+
+    # An asyncio.TimeoutError raised before the deadline is not converted
+    async def timeout(x):
+        raise asyncio.TimeoutError()
+
+    with deadline(1):
+        with pytest.raises(asyncio.TimeoutError) as exc:
+            await pipe(1, timeout)
+    assert not isinstance(exc.value, DeadlineExceeded)
+
+
+@pytest.mark.asyncio
+async def test_deadline_async_with():
+    with pytest.raises(DeadlineExceeded):
+        async with deadline(0.01):
+            await asyncio.sleep(1)
+    async with deadline(1):
+        await asyncio.sleep(0)
+    assert time_remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_timed_map():
+    async def wait(x):
+        await asyncio.sleep(x)
+        return x
+
+    assert await timed_map(wait, [0, 0.01, 0]) == [0, 0.01, 0]
+    assert await timed_map(lambda x: x + 1, [1, 2], limit=1) == [2, 3]
+    assert await timed_map(wait, []) == []
+
+    with pytest.raises(asyncio.TimeoutError):
+        await timed_map(wait, [0, 1], timeout=0.01)
+    assert await timed_map(wait, [0, 1, 0.001, 2], timeout=0.05,
+                           partial=True) == ([0, 0.001], [1, 2])
+
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            await timed_map(wait, [0, 1])
+    with deadline(0.05):
+        # Items that have not started by the deadline are not started
+        started = []
+        results, timed_out = await timed_map(
+            lambda x: started.append(x) or wait(x), [0.01, 1, 0.02, 1, 0],
+            limit=2, partial=True)
+    assert results == [0.01, 0.02]
+    assert timed_out == [1, 1, 0]
+    assert started == [0.01, 1, 0.02, 1]
+
+    async def fail(x):
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        await timed_map(fail, [1], partial=True)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited():
+    loop = asyncio.get_event_loop()
+    times = []
+
+    async def record(x):
+        times.append(loop.time())
+        return x
+
+    limited = rate_limited(record, 100, burst=2)
+    assert limited.__name__ == 'rate_limited_record'
+    start = loop.time()
+    assert await asyncio.gather(*[limited(i) for i in range(5)]) == \
+        [0, 1, 2, 3, 4]
+    # Two calls go through immediately, the rest are paced at 10ms
+    assert times[2] - start >= 0.009
+    assert times[4] - start >= 0.029
+    assert all(b >= a for a, b in zip(times, times[1:]))
+
+    # Sync functions are supported too
+    assert await rate_limited(lambda x: x + 1, 1000)(1) == 2
+    with pytest.raises(ValueError):
+        rate_limited(record, 0)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_shared():
+    limiter = RateLimiter(50)
+    inc = rate_limited(lambda x: x + 1, limiter)
+    dec = rate_limited(lambda x: x - 1, limiter)
+    assert inc.limiter is dec.limiter is limiter
+
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    assert await asyncio.gather(inc(1), dec(1), inc(2)) == [2, 0, 3]
+    assert loop.time() - start >= 0.039
+    assert limiter.tokens < 1
+
+    async with limiter:
+        pass
+
+    # A cancelled waiter hands its token back
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    before = limiter.tokens
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.tokens > before
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker():
+    calls = []
+
+    async def flaky(x):
+        calls.append(x)
+        if x < 0:
+            raise ValueError(x)
+        return x
+
+    breaker = circuit_breaker(flaky, failure_threshold=2, reset_timeout=0.02)
+    assert breaker.__name__ == 'circuit_breaker_flaky'
+    assert breaker.state == 'closed'
+    assert await breaker(1) == 1
+    with pytest.raises(ValueError):
+        await breaker(-1)
+    # A success resets the count of consecutive failures
+    assert await breaker(2) == 2
+    for i in range(2):
+        with pytest.raises(ValueError):
+            await breaker(-1)
+    assert breaker.state == 'open'
+
+    del calls[:]
+    with pytest.raises(CircuitOpen):
+        await breaker(3)
+    assert calls == []
+
+    await asyncio.sleep(0.02)
+    assert breaker.state == 'half_open'
+    # A failed probe opens the circuit again
+    with pytest.raises(ValueError):
+        await breaker(-2)
+    assert breaker.state == 'open'
+    await asyncio.sleep(0.02)
+    assert await breaker(4) == 4
+    assert breaker.state == 'closed'
+    assert calls == [-2, 4]
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_half_open():
+    release = asyncio.Event()
+
+    async def wait(x):
+        await release.wait()
+        return x
+
+    breaker = circuit_breaker(wait, reset_timeout=0, half_open_max=1,
+                              handler=lambda e: type(e).__name__)
+    breaker.opened_at = asyncio.get_event_loop().time()
+    probe = asyncio.ensure_future(breaker(1))
+    await asyncio.sleep(0)
+    # Only one probe at a time, the others are routed to the handler
+    assert await breaker(2) == 'CircuitOpen'
+    release.set()
+    assert await probe == 1
+    assert await breaker(3) == 3
+
+    def raise_(exc):
+        raise exc
+
+    # Exceptions other than ``exc`` do not count as failures
+    breaker = circuit_breaker(raise_, failure_threshold=1, exc=KeyError)
+    with pytest.raises(ValueError):
+        await breaker(ValueError)
+    assert breaker.state == 'closed'
+    with pytest.raises(KeyError):
+        await breaker(KeyError)
+    assert breaker.state == 'open'
+    breaker.reset()
+    assert breaker.state == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_retry():
+    attempts = []
+
+    async def flaky(x):
+        attempts.append(x)
+        if len(attempts) < 3:
+            raise ConnectionError(x)
+        return x
+
+    retrying = retry(flaky, exc=ConnectionError, backoff=0.001)
+    assert retrying.__name__ == 'retrying_flaky'
+    assert await retrying(1) == 1
+    assert attempts == [1, 1, 1]
+
+    del attempts[:]
+    with pytest.raises(ConnectionError):
+        await retry(flaky, max_attempts=2, backoff=0.001)(2)
+    assert attempts == [2, 2]
+
+    # Other exceptions and non-idempotent functions are not retried
+    del attempts[:]
+    with pytest.raises(ConnectionError):
+        await retry(flaky, exc=KeyError)(3)
+    with pytest.raises(ConnectionError):
+        await retry(flaky, idempotent=False)(3)
+    assert attempts == [3, 3]
+
+    # Backoff does not sleep past the deadline
+    del attempts[:]
+    with deadline(0.01):
+        with pytest.raises(ConnectionError):
+            await retry(flaky, backoff=10, max_backoff=10)(4)
+    assert len(attempts) < 3
+
+
+@pytest.mark.asyncio
+async def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+
+    def fail(x):
+        raise ValueError(x)
+
+    retrying = retry(fail, max_attempts=10, backoff=0, budget=budget)
+    with pytest.raises(ValueError):
+        await retrying(1)
+    assert budget.tokens < 1
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+@pytest.mark.asyncio
+async def test_retry_composes():
+    attempts = []
+
+    async def flaky(x):
+        attempts.append(x)
+        if len(attempts) % 2:
+            raise ConnectionError(x)
+        return x * 2
+
+    policy = curry(retry, exc=ConnectionError, backoff=0)
+    cached = await memoize(excepts(ConnectionError, await policy(flaky),
+                                   lambda e: -1))
+    assert await cached(1) == 2
+    assert await cached(1) == 2
+    assert attempts == [1, 1]
+
+    async def never(x):
+        raise ConnectionError(x)
+
+    assert await excepts(ConnectionError,
+                         await policy(never, max_attempts=2),
+                         lambda e: -1)(1) == -1
+
+
+@pytest.mark.asyncio
+async def test_batched():
+    batches = []
+
+    async def double_many(xs):
+        batches.append(xs)
+        return [x * 2 for x in xs]
+
+    double = batched(double_many)
+    assert double.__name__ == 'batched_double_many'
+    assert await asyncio.gather(double(1), double(2), double(1)) == [2, 4, 2]
+    # Equal arguments are passed once
+    assert batches == [[1, 2]]
+    assert await double(3) == 6
+    assert batches[-1] == [3]
+
+    del batches[:]
+    double = batched(double_many, max_batch_size=2)
+    assert await asyncio.gather(*map(double, range(5))) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1], [2, 3], [4]]
+
+    del batches[:]
+    double = batched(double_many, max_wait=0.01)
+
+    async def later(x):
+        await asyncio.sleep(0.001)
+        return await double(x)
+
+    assert await asyncio.gather(double(1), later(2)) == [2, 4]
+    assert batches == [[1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_batched_errors():
+    def check_many(xs):
+        return [ValueError(x) if x < 0 else x for x in xs]
+
+    check = batched(check_many)
+    results = await asyncio.gather(check(1), check(-1), return_exceptions=True)
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+
+    def broken(xs):
+        return xs[:1]
+
+    results = await asyncio.gather(*map(batched(broken), [1, 2]),
+                                   return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    # Unhashable arguments are not deduplicated
+    assert await asyncio.gather(*map(batched(lambda xs: xs), [[1], [1]])) \
+        == [[1], [1]]
+
+
+@pytest.mark.asyncio
+async def test_batched_memoize():
+    batches = []
+
+    async def inc_many(xs):
+        batches.append(xs)
+        return [x + 1 for x in xs]
+
+    inc = await memoize(batched(inc_many))
+    assert await asyncio.gather(inc(1), inc(2)) == [2, 3]
+    assert await asyncio.gather(inc(1), inc(3)) == [2, 4]
+    assert batches == [[1, 2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_memoize_many():
+    calls = []
+
+    async def double_many(xs):
+        calls.append(xs)
+        return [x * 2 for x in xs]
+
+    double = await memoize_many(double_many)
+    assert double.__name__ == 'double_many'
+    assert double.__wrapped__ is double_many
+    assert await double([1, 2, 3]) == [2, 4, 6]
+    assert await double([3, 2, 4, 4]) == [6, 4, 8, 8]
+    assert await double([]) == []
+    assert calls == [[1, 2, 3], [4]]
+
+    cache = {}
+    double = await memoize_many(double_many, cache=cache, key=abs)
+    assert double.cache is cache
+    assert await double([-1, 1]) == [-2, -2]
+    assert cache == {1: -2}
+    double.cache.clear()
+    assert await double([1]) == [2]
+    assert calls[-1] == [1]
+    with pytest.raises(TypeError):
+        await double([[1]])
+    double = await memoize_many(double_many)
+    with pytest.raises(TypeError, match='must be hashable'):
+        await double([[1]])
+
+
+@pytest.mark.asyncio
+async def test_memoize_many_single_flight():
+    calls = []
+
+    async def slow_many(xs):
+        calls.append(xs)
+        await asyncio.sleep(0.01)
+        return [x + 1 for x in xs]
+
+    slow = await memoize_many(slow_many)
+    assert await asyncio.gather(slow([1, 2]), slow([2, 3]), slow([1])) == \
+        [[2, 3], [3, 4], [2]]
+    assert calls == [[1, 2], [3]]
+
+    # A cancelled caller does not cancel the computation others await
+    del calls[:]
+    first = asyncio.ensure_future(slow([5, 6]))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(slow([6]))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == [7]
+    assert calls == [[5, 6]]
+
+    def broken(xs):
+        return []
+
+    broken = await memoize_many(broken)
+    with pytest.raises(ValueError):
+        await broken([1])
+
+
+async def collect(ait):
+    result = []
+    while True:
+        try:
+            result.append(await ait.__anext__())
+        except StopAsyncIteration:
+            return result
+
+
+class Ticker(object):
+    """ An async iterator yielding ``range(n)`` with a pause per item """
+    def __init__(self, n, fail=False):
+        self.i = 0
+        self.n = n
+        self.fail = fail
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0.001)
+        if self.i == self.n:
+            if self.fail:
+                raise ValueError(self.n)
+            raise StopAsyncIteration
+        self.i += 1
+        return self.i - 1
+
+
+@pytest.mark.asyncio
+async def test_memoize_stream():
+    calls = []
+
+    def numbers(n):
+        calls.append(n)
+        return iter(range(n))
+
+    numbers = await memoize_stream(numbers)
+    assert numbers.__name__ == 'numbers'
+    assert await collect(numbers(3)) == [0, 1, 2]
+    assert await collect(numbers(3)) == [0, 1, 2]
+    assert await collect(numbers(2)) == [0, 1]
+    assert calls == [3, 2]
+
+    # Partial consumption is resumed by later consumers
+    partial_ = numbers(5)
+    assert await partial_.__anext__() == 0
+    assert await collect(numbers(5)) == [0, 1, 2, 3, 4]
+    assert await collect(partial_) == [1, 2, 3, 4]
+    assert calls == [3, 2, 5]
+
+    with pytest.raises(TypeError):
+        numbers([])
+
+
+@pytest.mark.asyncio
+async def test_memoize_stream_shared():
+    calls = []
+
+    async def ticks(n, fail=False):
+        calls.append(n)
+        return Ticker(n, fail)
+
+    ticks = await memoize_stream(ticks)
+    assert await asyncio.gather(collect(ticks(4)), collect(ticks(4))) == \
+        [[0, 1, 2, 3], [0, 1, 2, 3]]
+    assert await collect(ticks(4)) == [0, 1, 2, 3]
+    assert calls == [4]
+
+    # Failed productions are reported to every consumer and not cached
+    for i in range(2):
+        results = await asyncio.gather(collect(ticks(2, fail=True)),
+                                       collect(ticks(2, fail=True)),
+                                       return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+    assert calls == [4, 2, 2]
+    assert len(ticks.cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_memoize_stream_max_items():
+    calls = []
+
+    def numbers(n):
+        calls.append(n)
+        return iter(range(n))
+
+    numbers = await memoize_stream(numbers, max_items=3)
+    assert await collect(numbers(3)) == [0, 1, 2]
+    assert await collect(numbers(3)) == [0, 1, 2]
+    assert calls == [3]
+
+    # Overlong streams pass through to the consumers already reading them
+    first, second = numbers(5), numbers(5)
+    assert await first.__anext__() == 0
+    assert await collect(second) == [0, 1, 2, 3, 4]
+    assert 5 not in numbers.cache
+    assert first.production.offset == 1
+    assert await collect(first) == [1, 2, 3, 4]
+    assert await collect(numbers(5)) == [0, 1, 2, 3, 4]
+    assert calls == [3, 5, 5]
+
+
+@pytest.mark.asyncio
+async def test_memoize_ttl():
+    calls = []
+
+    async def inc(x):
+        calls.append(x)
+        return x + 1
+
+    memo = await memoize(inc, ttl=10)
+    assert memo.ttl == 10
+    # Functions defined within functions are only registered with a name
+    assert memo.cache_name is None
+    assert await memo(1) == 2
+    assert await memo(1) == 2
+    assert calls == [1]
+    result, expires, delta = memo.cache[1]
+    assert result == 2
+    assert delta >= 0
+
+    memo.cache[1] = (2, 0, 0)  # expired
+    assert await memo(1) == 2
+    assert calls == [1, 1]
+    assert memo.cache[1][1] > 0
+
+
+@pytest.mark.asyncio
+async def test_memoize_single_flight():
+    calls = []
+
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x + 1
+
+    memo = await memoize(slow, ttl=10)
+    assert await asyncio.gather(memo(1), memo(1), memo(2)) == [2, 2, 3]
+    assert calls == [1, 2]
+
+    async def fail(x):
+        await asyncio.sleep(0)
+        raise ValueError(x)
+
+    memo = await memoize(fail, ttl=10)
+    results = await asyncio.gather(memo(1), memo(1), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert memo.cache == {}
+
+    with pytest.raises(ValueError):
+        await memoize(slow, stale_while_revalidate=1)
+
+
+@pytest.mark.asyncio
+async def test_memoize_stale_while_revalidate():
+    calls = []
+
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    memo = await memoize(slow, ttl=10, stale_while_revalidate=5)
+    assert await memo('a') == 1
+    result, expires, delta = memo.cache['a']
+    assert delta > 0
+
+    # Within the stale window the old result is served immediately and a
+    # single background call refreshes it
+    memo.cache['a'] = (result, time.time() - 1, delta)
+    assert await asyncio.gather(memo('a'), memo('a')) == [1, 1]
+    await asyncio.sleep(0.02)
+    assert calls == ['a', 'a']
+    assert memo.cache['a'][0] == 2
+    assert await memo('a') == 2
+
+    # Past the stale window callers wait for a new result
+    memo.cache['a'] = (2, time.time() - 6, delta)
+    assert await memo('a') == 3
+
+
+@pytest.mark.asyncio
+async def test_memoize_early_refresh():
+    calls = []
+
+    async def inc(x):
+        calls.append(x)
+        return x + 1
+
+    memo = await memoize(inc, ttl=10, early_refresh=1.0)
+    assert await memo(1) == 2
+    # Far from expiry relative to the compute time: no refresh
+    memo.cache[1] = (2, time.time() + 10, 0.001)
+    for i in range(20):
+        assert await memo(1) == 2
+    assert calls == [1]
+
+    # Compute time dwarfs the time to expiry: refreshed early
+    memo.cache[1] = (2, time.time() + 0.001, 1000)
+    assert await memo(1) == 2
+    await asyncio.sleep(0)
+    assert calls == [1, 1]
+    assert memo.cache[1][1] > time.time() + 9
+
+
+@pytest.mark.asyncio
+async def test_memoize_method():
+    calls = []
+
+    class Conn(object):
+        def __init__(self, name):
+            self.name = name
+
+        @memoize_method
+        async def schema(self, table):
+            """ schema docstring """
+            calls.append((self.name, table))
+            await asyncio.sleep(0.001)
+            return '%s.%s' % (self.name, table)
+
+        @memoize_method
+        def add(self, x, y=0):
+            return x + y
+
+    assert Conn.schema.__name__ == 'schema'
+    assert 'schema docstring' in Conn.schema.__doc__
+    a, b = Conn('a'), Conn('b')
+    assert await asyncio.gather(a.schema('t'), a.schema('t'),
+                                b.schema('t')) == ['a.t', 'a.t', 'b.t']
+    assert await a.schema('t') == 'a.t'
+    assert calls == [('a', 't'), ('b', 't')]
+    assert Conn.schema.cache(a) == {'t': 'a.t'}
+    assert await a.add(1, y=2) == 3
+    assert await a.add(1, y=2) == 3
+    with pytest.raises(TypeError):
+        await a.schema([])
+
+    # Caches are released with their instance
+    del a
+    gc.collect()
+    assert len(Conn.schema._state) == 1
+
+
+@pytest.mark.asyncio
+async def test_memoize_method_weak_keys():
+    class Key(object):
+        pass
+
+    class Service(object):
+        __slots__ = ('__weakref__',)
+
+        def lookup(self, key):
+            return id(key)
+        lookup = memoize_method(lookup, weak_keys=True)
+
+    service = Service()
+    key = Key()
+    assert await service.lookup(key) == id(key)
+    assert len(Service.lookup.cache(service)) == 1
+    del key
+    gc.collect()
+    assert len(Service.lookup.cache(service)) == 0
+
+    with pytest.raises(TypeError):
+        memoize_method(lambda self, x, y: x, weak_keys=True)
+
+
+@pytest.mark.asyncio
+async def test_memoize_tags():
+    calls = []
+
+    async def profile(user):
+        calls.append(user)
+        tag(('user', user))
+        return {'user': user, 'n': len(calls)}
+
+    async def page(user):
+        return 'page of %s' % (await profile(user))['user']
+
+    profile = await memoize(profile, tags=True)
+    page = await memoize(page, tags=lambda args, kwargs, result: ['pages'])
+
+    assert (await profile(1))['n'] == 1
+    assert (await profile(1))['n'] == 1
+    assert await page(1) == 'page of 1'
+    assert await page(2) == 'page of 2'
+    assert profile.entry_tags[1] == {('user', 1)}
+    # ``page`` depends on ``profile`` and inherits its tags, on a miss as
+    # well as on a hit
+    assert page.entry_tags[1] == {('user', 1), 'pages'}
+    assert page.entry_tags[2] == {('user', 2), 'pages'}
+
+    assert await invalidate(('user', 1)) == 2
+    assert 1 not in profile.cache
+    assert 1 not in page.cache
+    assert 2 in page.cache
+    assert (await profile(1))['n'] == 3
+    assert await invalidate(('user', 1), 'unknown') == 1
+    assert await invalidate('pages') == 1
+    assert page.cache == {}
+
+    # Calls outside memoized computations are ignored
+    tag('nothing')
+
+
+@pytest.mark.asyncio
+async def test_invalidate_while_computing():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(x):
+        tag(x)
+        started.set()
+        await release.wait()
+        return x
+
+    slow = await memoize(slow, tags=True, ttl=60)
+    task = asyncio.ensure_future(slow('a'))
+    await started.wait()
+    await invalidate('a')
+    release.set()
+    assert await task == 'a'
+    assert slow.cache == {}
+    assert await slow('a') == 'a'
+    assert 'a' in slow.cache
+
+
+@pytest.mark.asyncio
+async def test_memoize_tags_pruned():
+    from aiotoolz import functoolz
+    from aiotoolz.caches import LRUCache
+
+    async def f(x):
+        tag(('x', x), 'all')
+        return x
+
+    f = await memoize(f, cache=LRUCache(10), tags=True)
+    for x in range(10000):
+        assert await f(x) == x
+    # The tags of evicted entries are dropped along the way
+    assert len(f.cache) == 10
+    assert len(f.entry_tags) < 100
+    assert len(functoolz._tagged) < 100
+    assert len(functoolz._tagged['all']) == len(f.entry_tags)
+    assert await invalidate(('x', 9999), ('x', 0)) == 1
+    assert await invalidate('all') == 9
+    assert functoolz._tagged == {}
+    # Only computations in flight need to know about invalidations
+    assert functoolz._invalidated == {}
+
+    await f(1)
+    del f
+    gc.collect()
+    assert functoolz._tagged == {}
+
+
+@pytest.mark.asyncio
+async def test_memoize_tags_pruned_async_cache():
+    from aiotoolz.caches import LRUCache
+
+    class AsyncLRUCache(object):
+        def __init__(self, maxsize):
+            self.data = LRUCache(maxsize)
+            self.gets = 0
+
+        async def aget(self, key):
+            self.gets += 1
+            return self.data[key]
+
+        async def aset(self, key, value):
+            self.data[key] = value
+
+        async def adelete(self, key):
+            self.data.pop(key, None)
+
+        async def acontains(self, key):
+            return key in self.data
+
+    async def f(x):
+        tag(x)
+        return x
+
+    cache = AsyncLRUCache(10)
+    f = await memoize(f, cache=cache, tags=True)
+    for x in range(1000):
+        assert await f(x) == x
+    await asyncio.sleep(0)
+    # Pruning uses ``acontains``, in the background, rather than ``aget``
+    assert cache.gets == 1000
+    assert len(f.entry_tags) < 100
+
+
+@pytest.mark.asyncio
+async def test_async_cached_property():
+    calls = []
+
+    class Connection(object):
+        """ A connection """
+        def __init__(self, name):
+            self.name = name
+
+        @async_cached_property
+        async def metadata(self):
+            """ The metadata of the connection """
+            calls.append(self.name)
+            await asyncio.sleep(0.001)
+            return {'name': self.name}
+
+        @async_cached_property(classval='version')
+        def version(self):
+            calls.append('version')
+            return 3
+
+    assert Connection.metadata is None
+    assert Connection.version == 'version'
+    a, b = Connection('a'), Connection('b')
+    assert await asyncio.gather(a.metadata, a.metadata, b.metadata) == \
+        [{'name': 'a'}, {'name': 'a'}, {'name': 'b'}]
+    assert await a.metadata == {'name': 'a'}
+    assert a.__dict__['metadata'] == {'name': 'a'}
+    assert await a.version == await a.version == 3
+    assert calls == ['a', 'b', 'version']
+
+    del a.metadata
+    assert await a.metadata == {'name': 'a'}
+    assert calls == ['a', 'b', 'version', 'a']
+    a.metadata = {}
+    assert await a.metadata == {}
+
+    # A reset during the computation discards its result
+    first = a.metadata
+    del a.metadata
+    task = asyncio.ensure_future(first)
+    await asyncio.sleep(0)
+    del a.metadata
+    assert await task == {'name': 'a'}
+    assert 'metadata' not in a.__dict__
+
+
+@pytest.mark.asyncio
+async def test_async_cached_property_slots():
+    calls = []
+
+    class Connection(object):
+        __slots__ = ('_metadata',)
+
+        @async_cached_property(slot='_metadata')
+        async def metadata(self):
+            calls.append(1)
+            await asyncio.sleep(0.001)
+            if len(calls) == 1:
+                raise ValueError('unavailable')
+            return len(calls)
+
+    conn = Connection()
+    results = await asyncio.gather(conn.metadata, conn.metadata,
+                                   return_exceptions=True)
+    assert [type(r) for r in results] == [ValueError, ValueError]
+    assert not hasattr(conn, '_metadata')
+
+    # A cancelled awaiter does not cancel the computation others await
+    first = asyncio.ensure_future(conn.metadata)
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(conn.metadata)
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 2
+    assert conn._metadata == 2
+    del conn.metadata
+    del conn.metadata
+    assert await conn.metadata == 3
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def start(self, name):
+        self.events.append(('start', name))
+        return len(self.events)
+
+    def end(self, token, name, duration, error):
+        assert duration >= 0
+        self.events.append(('end', name, token, type(error).__name__))
+
+
+@pytest.mark.asyncio
+async def test_tracer():
+    tracer = add_tracer(RecordingTracer())
+    try:
+        assert await pipe(1, inc, double) == 4
+        assert tracer.events == [('start', 'inc'),
+                                 ('end', 'inc', 1, 'NoneType'),
+                                 ('start', 'double'),
+                                 ('end', 'double', 3, 'NoneType')]
+
+        del tracer.events[:]
+        assert await compose(double, inc)(1) == 4
+        assert await juxt(inc, double)(1) == (2, 2)
+        assert await thread_last(2, (pow, 3)) == 9
+        assert await timed_map(inc, [1]) == [2]
+        assert [e[1] for e in tracer.events if e[0] == 'start'] == \
+            ['inc', 'double', 'inc', 'double', 'pow', 'inc']
+
+        async def fail(x):
+            raise ValueError(x)
+
+        del tracer.events[:]
+        with pytest.raises(ValueError):
+            await compose(fail, inc)(1)
+        assert tracer.events[-1] == ('end', 'fail', 3, 'ValueError')
+    finally:
+        remove_tracer(tracer)
+
+    del tracer.events[:]
+    assert await pipe(1, inc) == 2
+    assert tracer.events == []
@@ -2,6 +2,7 @@ from aiotoolz import *
 import aiotoolz
 import aiotoolz.curried
 import pickle
+import pytest
 from aiotoolz.compatibility import PY3
 from aiotoolz.utils import raises
 
@@ -12,12 +13,33 @@ def test_compose():
     assert f((1, 2)) == g((1, 2))
 
 
+@pytest.mark.asyncio
+async def test_compile_thread():
+    f = aiotoolz.compile_thread_last((pow, 2), str)
+    g = pickle.loads(pickle.dumps(f))
+    assert await g(3) == await f(3) == '8'
+    assert g.last is True
+
+
 def test_curry():
     f = curry(map)(str)
     g = pickle.loads(pickle.dumps(f))
     assert list(f((1, 2, 3))) == list(g((1, 2, 3)))
 
 
+def test_curry_attributes():
+    f = curry(map, str)
+    f.__name__ = 'strmap'
+    f.__doc__ = 'Stringify everything'
+    f.__qualname__ = 'strmap'
+    g = pickle.loads(pickle.dumps(f))
+    assert g.__name__ == 'strmap'
+    assert g.__doc__ == 'Stringify everything'
+    assert g.__qualname__ == 'strmap'
+    assert g.__module__ == map.__module__
+    assert pickle.loads(pickle.dumps(curry)) is curry
+
+
 def test_juxt():
     f = juxt(str, int, bool)
     g = pickle.loads(pickle.dumps(f))
@@ -45,6 +67,13 @@ def test_instanceproperty():
     assert p2.__get__(1) is True
 
 
+def test_async_cached_property():
+    p = aiotoolz.functoolz.AsyncCachedProperty(bool, classval=False)
+    p2 = pickle.loads(pickle.dumps(p))
+    assert p2.func is bool
+    assert p2.__get__(None) is False
+
+
 def f(x, y):
     return x, y
 
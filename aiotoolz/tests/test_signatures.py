@@ -1,4 +1,6 @@
 import functools
+import subprocess
+import sys
 import aiotoolz._signatures as _sigs
 from aiotoolz._signatures import builtins, _is_valid_args, _is_partial_args
 from aiotoolz.compatibility import PY3
@@ -85,3 +87,30 @@ def test_for_coverage():  # :)
     assert _sigs._has_keywords(None) is None
     assert _sigs._num_required_args(None) is None
 
+
+def test_registry_is_lazy():
+    registry = _sigs.SignatureRegistry()
+    assert len(registry) == 0
+    assert registry._pending is None
+    assert builtins.abs in registry
+    assert len(registry) == 0
+    sigs = registry[builtins.abs]
+    assert registry[builtins.abs] is sigs
+    assert list(registry) == [builtins.abs]
+    assert builtins.abs not in registry.pending
+    assert (lambda x: None) not in registry
+
+    del registry[builtins.abs]
+    assert builtins.abs not in registry
+
+    registry = _sigs.SignatureRegistry()
+    _sigs.create_signature_registry(signatures=registry)
+    assert not registry.pending
+    assert builtins.abs in registry
+
+
+def test_import_does_not_expand_registry():
+    code = ('import aiotoolz, aiotoolz._signatures as s; '
+            'print(len(s.signatures), s.signatures._pending is None)')
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.split() == [b'0', b'True']
@@ -1,3 +1,5 @@
+import pytest
+
 import aiotoolz
 
 
@@ -49,7 +51,151 @@ def test_tlz():
     assert aiotlz.__file__ == aiotoolz.__file__
     assert aiotlz.functoolz.__file__ == aiotoolz.functoolz.__file__
 
-    assert aiotlz.pipe is aiotoolz.pipe
+    assert getattr(aiotlz.pipe, 'slow', aiotlz.pipe) is aiotoolz.pipe
 
     assert 'aiotlz' in aiotlz.__doc__
     assert aiotlz.curried.__doc__ is not None
+
+
+def test_tlz_lazy():
+    import aiotlz
+    assert 'partitionby' in dir(aiotlz)
+    assert aiotlz.partitionby is aiotoolz.partitionby or 'cytoolz' in repr(
+        aiotlz.partitionby)
+    assert aiotlz.partitionby is aiotlz.__dict__['partitionby']
+    try:
+        aiotlz.thisisabadname
+        1/0
+    except AttributeError:
+        pass
+
+
+def inc(x):
+    return x + 1
+
+
+async def ainc(x):
+    return x + 1
+
+
+def sync_valmap(func, d):
+    return {k: func(v) for k, v in d.items()}
+
+
+def sync_pipe(data, *funcs):
+    for func in funcs:
+        data = func(data)
+    return data
+
+
+class sync_curry(object):
+    """ A minimal synchronous curry, standing in for ``cytoolz.curry`` """
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __call__(self, *args):
+        args = self.args + args
+        if len(args) < 2:
+            return sync_curry(self.func, *args)
+        return self.func(*args)
+
+
+@pytest.mark.asyncio
+async def test_tlz_route():
+    from aiotlz._build_tlz import tlz_loader
+
+    valmap = tlz_loader.route(sync_valmap, aiotoolz.valmap)
+    assert valmap.fast is sync_valmap
+    assert valmap.slow is aiotoolz.valmap
+    assert valmap.__name__ == 'valmap'
+    # Calls return awaitables whichever function they are routed to
+    assert await valmap(inc, {'a': 1}) == {'a': 2}
+    assert await valmap(ainc, {'a': 1}) == {'a': 2}
+
+    pipe = tlz_loader.route(sync_pipe, aiotoolz.pipe)
+    assert await pipe(1, inc, inc) == 3
+    assert await pipe(1, ainc, ainc) == 3
+    # Awaitables returned by synchronous functions are awaited
+    assert await pipe(1, inc, lambda x: ainc(x)) == 3
+
+    assert tlz_loader.async_callables[ainc] is True
+    assert tlz_loader.async_callables[inc] is False
+
+
+@pytest.mark.asyncio
+async def test_tlz_route_curried():
+    import aiotoolz.curried
+    from aiotlz._build_tlz import tlz_loader
+
+    valmap = tlz_loader.route(sync_curry(sync_valmap),
+                              aiotoolz.curried.valmap)
+    assert await valmap(inc, {'a': 1}) == {'a': 2}
+    # Partial applications are routed in turn
+    inc_values = await valmap(inc)
+    assert inc_values.fast.args == (inc,)
+    assert await inc_values({'a': 1}) == {'a': 2}
+    ainc_values = await valmap(ainc)
+    assert isinstance(ainc_values, aiotoolz.curry)
+    assert await ainc_values({'a': 1}) == {'a': 2}
+
+
+def test_tlz_has_async_args():
+    from aiotlz._build_tlz import tlz_loader
+
+    class AsyncIterable(object):
+        def __aiter__(self):
+            return self
+
+    has_async_args = tlz_loader.has_async_args
+    assert not has_async_args((1, inc, [1, 2], 'a'), {'key': inc})
+    assert has_async_args((1, ainc), {})
+    assert has_async_args((1,), {'key': ainc})
+    assert has_async_args((AsyncIterable(),), {})
+    # The items of thread forms are checked
+    assert has_async_args((1, (map, ainc)), {})
+    assert not has_async_args((1, (map, inc), (filter, None)), {})
+    # Data isn't searched
+    assert not has_async_args(([ainc],), {})
+    assert not has_async_args(((1, ainc),), {})
+
+
+@pytest.mark.asyncio
+async def test_tlz_routing():
+    cytoolz = pytest.importorskip('cytoolz')
+    import aiotlz
+
+    assert aiotlz.pipe.fast is cytoolz.pipe
+    assert aiotlz.pipe.slow is aiotoolz.pipe
+    assert aiotlz.functoolz.pipe is aiotlz.pipe
+    assert aiotlz.groupby is cytoolz.groupby
+    assert aiotlz.curry is aiotoolz.curry
+    assert aiotlz.juxt is aiotoolz.juxt
+    assert aiotlz.excepts is aiotoolz.excepts
+    assert aiotlz.compose is aiotoolz.compose
+
+    assert await aiotlz.pipe(1, inc, inc) == 3
+    assert await aiotlz.pipe(1, ainc, ainc) == 3
+    assert await aiotlz.valmap(inc, {'a': 1}) == {'a': 2}
+    assert await aiotlz.valmap(ainc, {'a': 1}) == {'a': 2}
+    assert await aiotlz.compose(ainc, ainc)(1) == 3
+    assert await aiotlz.juxt(ainc, ainc)(1) == (2, 2)
+    assert await aiotlz.thread_first(1, (aiotoolz.curry(ainc),)) == 2
+
+    import aiotlz.curried
+    assert aiotlz.curried.valmap.fast is cytoolz.curried.valmap
+    assert await (await aiotlz.curried.valmap(inc))({'a': 1}) == {'a': 2}
+
+
+def test_is_async_callable():
+    from functools import partial
+    from aiotlz._build_tlz import is_async_callable
+
+    assert is_async_callable(ainc)
+    assert is_async_callable(partial(ainc))
+    assert is_async_callable(aiotoolz.curry(inc))
+    assert is_async_callable(aiotoolz.compose(inc, inc))
+    assert not is_async_callable(inc)
+    assert not is_async_callable(partial(inc))
+    assert not is_async_callable(str)
+    assert not is_async_callable(len)
@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+import pytest
+
+from aiotoolz import (add_tracer, remove_tracer, compose, pipe,
+                      thread_first)
+from aiotoolz.tracing import Span, SpanTracer, BlockingDetector, Meter
+
+
+async def inc(x):
+    return x + 1
+
+
+async def fail(x):
+    raise ValueError('bad %s' % x)
+
+
+@pytest.mark.asyncio
+async def test_span_tracer():
+    tracer = add_tracer(SpanTracer(attributes={'service': 'test'}))
+    try:
+        assert await pipe(1, inc, compose(inc, inc)) == 4
+        with pytest.raises(ValueError):
+            await pipe(1, fail)
+    finally:
+        remove_tracer(tracer)
+
+    spans = list(tracer.spans)
+    assert [span.name for span in spans] == \
+        ['inc', 'inc', 'inc', 'inc_of_inc', 'fail']
+    first, nested1, nested2, composed, failed = spans
+    assert first.parent_id is None
+    assert nested1.parent_id == nested2.parent_id == composed.span_id
+    assert nested1.trace_id == composed.trace_id != first.trace_id
+    assert all(span.status == 'OK' for span in spans[:-1])
+    assert composed.start_time <= nested1.start_time
+    assert composed.duration >= nested2.duration >= 0
+
+    assert failed.status == 'ERROR'
+    assert failed.events[0]['attributes']['exception.message'] == 'bad 1'
+    data = failed.to_dict()
+    assert data['name'] == 'fail'
+    assert data['parent_id'] is None
+    assert data['status']['status_code'] == 'ERROR'
+    assert data['attributes'] == {'service': 'test'}
+    assert len(data['context']['span_id']) == 18
+
+
+@pytest.mark.asyncio
+async def test_span_tracer_exporter():
+    exported = []
+    tracer = add_tracer(SpanTracer(exporter=exported.append, maxlen=1))
+    try:
+        await asyncio.gather(pipe(1, inc), pipe(2, inc))
+    finally:
+        remove_tracer(tracer)
+    assert len(exported) == 2
+    assert all(isinstance(span, Span) for span in exported)
+    assert exported[0].trace_id != exported[1].trace_id
+    assert not tracer.spans
+
+
+def busy(x):
+    time.sleep(0.02)
+    return x
+
+
+async def abusy(x):
+    await asyncio.sleep(0.05)
+    busy(x)
+    return x
+
+
+@pytest.mark.asyncio
+async def test_blocking_detector():
+    reports = []
+    detector = add_tracer(BlockingDetector(0.01, report=reports.append))
+    try:
+        assert await thread_first(1, inc, busy, compose(abusy, inc)) == 3
+    finally:
+        remove_tracer(detector)
+
+    assert [r.name for r in reports] == ['busy', 'abusy']
+    assert all(r.duration >= 0.01 for r in reports)
+    assert reports[0].call_site.startswith(__file__)
+    assert 'test_blocking_detector' in reports[0].call_site
+
+    stats = detector.stats
+    assert stats['busy'].calls == stats['busy'].blocked == 1
+    assert stats['abusy'].calls == stats['abusy'].blocked == 1
+    assert stats['inc'].calls == 2 and stats['inc'].blocked == 0
+    # The sleep does not hold the loop, and the nested stages do not count
+    # for the composition
+    assert stats['abusy'].total < 0.045
+    assert stats['abusy_of_inc'].blocked == 0
+    assert stats['abusy_of_inc'].total < 0.01
+    assert detector.summary()[0].name in ('busy', 'abusy')
+    assert 'calls=1' in repr(stats['busy'])
+    detector.reset()
+    assert detector.summary() == []
+
+
+@pytest.mark.asyncio
+async def test_blocking_detector_logs(caplog):
+    detector = add_tracer(BlockingDetector(0.01))
+    try:
+        with pytest.raises(ValueError):
+            await thread_first(1, busy, fail)
+        task = asyncio.ensure_future(pipe(1, abusy))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    finally:
+        remove_tracer(detector)
+    assert 'stage busy held the event loop' in caplog.text
+    assert detector.stats['fail'].calls == 1
+    assert detector.stats['abusy'].blocked == 0
+
+
+class Slow(object):
+    """ An async iterator over ``range(n)`` with a pause per item """
+    def __init__(self, n):
+        self.i = 0
+        self.n = n
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0.001)
+        if self.i == self.n:
+            raise StopAsyncIteration
+        self.i += 1
+        return self.i - 1
+
+
+def test_meter():
+    snapshots = []
+    meter = Meter(size=len, every=2, interval=0, callback=snapshots.append)
+    assert meter.snapshot() is None
+    it = meter.iter(['ab', 'cde', 'f', 'gh', 'ij'])
+    assert next(it) == 'ab'
+    assert snapshots == []
+    snapshot = meter.snapshot()
+    assert (snapshot.count, snapshot.bytes, snapshot.total) == (1, 2, 5)
+    assert snapshot.in_flight == 0
+    assert list(it) == ['cde', 'f', 'gh', 'ij']
+
+    assert [s.count for s in snapshots] == [2, 4, 5]
+    assert [s.bytes for s in snapshots] == [5, 8, 10]
+    final = snapshots[-1]
+    assert final.eta == 0
+    assert final.mean_rate > 0 and final.rate >= 0
+    assert final.elapsed >= snapshots[0].elapsed
+
+    meter = Meter(interval=3600, every=1, callback=snapshots.append)
+    del snapshots[:]
+    assert list(meter.iter(iter(range(3)))) == [0, 1, 2]
+    assert len(snapshots) == 1
+    assert snapshots[0].total is None and snapshots[0].eta is None
+
+
+@pytest.mark.asyncio
+async def test_meter_async():
+    snapshots = []
+    meter = Meter(total=10, every=5, interval=0, callback=snapshots.append)
+    metered = await meter(Slow(10))
+    in_flight = []
+
+    async def consume():
+        result = []
+        while True:
+            try:
+                result.append(await metered.__anext__())
+            except StopAsyncIteration:
+                return result
+            in_flight.append(meter.in_flight)
+
+    first, second = await asyncio.gather(consume(), consume())
+    assert sorted(first + second) == list(range(10))
+    assert max(in_flight) == 1
+    assert [s.count for s in snapshots] == [5, 10, 10]
+    assert meter.snapshot().in_flight == 0
+    assert snapshots[0].eta > 0
+    assert snapshots[0].rate > 0
+
+    assert list(await meter([1])) == [1]
+    assert meter.count == 11
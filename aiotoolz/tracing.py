@@ -0,0 +1,409 @@
+from collections import deque, namedtuple
+import logging
+import os
+import random
+import sys
+import time
+
+from .compatibility import ContextVar
+from .functoolz import Tracer
+
+
+__all__ = ('Span', 'SpanTracer', 'BlockingDetector', 'BlockingStats',
+           'Blocked', 'Meter', 'MeterSnapshot')
+
+
+# The span of the stage currently running, the parent of any nested stage
+_current_span = ContextVar('aiotoolz.tracing.current_span', default=None)
+
+
+class Span(object):
+    """ The run of one pipeline stage, shaped like an OpenTelemetry span
+
+    ``trace_id`` and ``span_id`` are random 128 and 64 bit integers, and
+    ``parent_id`` the ``span_id`` of the stage this one ran within, if any.
+    Times are in nanoseconds since the epoch.  ``status`` is ``'OK'`` or
+    ``'ERROR'``, and ``events`` holds an ``'exception'`` event for stages
+    that raised.
+
+    See Also:
+        SpanTracer
+    """
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_time',
+                 'end_time', 'status', 'description', 'attributes',
+                 'events')
+
+    def __init__(self, name, trace_id, span_id, parent_id=None,
+                 start_time=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_time = start_time
+        self.end_time = None
+        self.status = 'UNSET'
+        self.description = None
+        self.attributes = dict(attributes or ())
+        self.events = []
+
+    @property
+    def duration(self):
+        """ The duration of the span in seconds """
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e9
+
+    def to_dict(self):
+        """ The span in the layout of OpenTelemetry's JSON export """
+        return {
+            'name': self.name,
+            'context': {
+                'trace_id': '0x%032x' % self.trace_id,
+                'span_id': '0x%016x' % self.span_id,
+                'trace_state': '[]',
+            },
+            'kind': 'SpanKind.INTERNAL',
+            'parent_id': (None if self.parent_id is None
+                          else '0x%016x' % self.parent_id),
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'status': {'status_code': self.status,
+                       'description': self.description},
+            'attributes': dict(self.attributes),
+            'events': [dict(event) for event in self.events],
+            'links': [],
+        }
+
+    def __repr__(self):
+        return '%s(%r, span_id=0x%016x, status=%r)' % (
+            type(self).__name__, self.name, self.span_id, self.status)
+
+
+class SpanTracer(Tracer):
+    """ A ``Tracer`` recording pipeline stages as OpenTelemetry-like spans
+
+    Each finished ``Span`` is passed to ``exporter`` if given, and is
+    otherwise kept in ``spans``, which holds the last ``maxlen`` spans.
+    Stages run within another stage, such as the functions of a ``compose``
+    used in a ``pipe``, are its children in the same trace.  ``attributes``
+    are copied to every span.  No collector or OpenTelemetry install is
+    needed; an exporter can forward ``span.to_dict()`` to one.  Requires
+    Python 3.7 or later.
+
+    >>> from aiotoolz import add_tracer, pipe
+    >>> tracer = add_tracer(SpanTracer())  # doctest: +SKIP
+    >>> await pipe(1, inc, double)  # doctest: +SKIP
+    4
+    >>> [span.name for span in tracer.spans]  # doctest: +SKIP
+    ['inc', 'double']
+
+    See Also:
+        aiotoolz.functoolz.Tracer
+        aiotoolz.functoolz.add_tracer
+    """
+    def __init__(self, exporter=None, maxlen=1000, attributes=None):
+        self.exporter = exporter
+        self.attributes = attributes
+        self.spans = deque(maxlen=maxlen)
+        self._random = random.Random()
+
+    def start(self, name):
+        parent = _current_span.get()
+        if parent is None:
+            trace_id = self._random.getrandbits(128)
+            parent_id = None
+        else:
+            trace_id = parent.trace_id
+            parent_id = parent.span_id
+        span = Span(name, trace_id, self._random.getrandbits(64), parent_id,
+                    int(time.time() * 1e9), self.attributes)
+        return span, _current_span.set(span)
+
+    def end(self, token, name, duration, error):
+        span, reset = token
+        _current_span.reset(reset)
+        span.end_time = span.start_time + int(duration * 1e9)
+        if error is None:
+            span.status = 'OK'
+        else:
+            span.status = 'ERROR'
+            span.description = '%s: %s' % (type(error).__name__, error)
+            span.events.append({
+                'name': 'exception',
+                'timestamp': span.end_time,
+                'attributes': {
+                    'exception.type': type(error).__name__,
+                    'exception.message': str(error),
+                },
+            })
+        if self.exporter is not None:
+            self.exporter(span)
+        else:
+            self.spans.append(span)
+
+
+Blocked = namedtuple('Blocked', ['name', 'duration', 'call_site'])
+Blocked.__doc__ = """ A stage that held the event loop past a threshold
+
+``duration`` is in seconds, and ``call_site`` the ``'file:line in
+function'`` of the innermost frame outside of aiotoolz running the
+pipeline, or ``None`` if there is none.
+"""
+
+_logger = logging.getLogger('aiotoolz')
+
+# The directory of the modules of aiotoolz, skipped when finding call sites
+_package_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _call_site():
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.abspath(code.co_filename)
+        if os.path.dirname(filename) != _package_dir:
+            return '%s:%d in %s' % (filename, frame.f_lineno, code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class BlockingStats(object):
+    """ How long calls of a stage held the event loop
+
+    ``calls`` counts the calls and ``blocked`` the slices of time held at
+    or over the threshold of the ``BlockingDetector``.  ``total`` is the
+    time held by all calls and ``max`` the longest slice, in seconds.
+    """
+    __slots__ = ('name', 'calls', 'blocked', 'total', 'max')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.blocked = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self):
+        """ The mean time held per call """
+        return self.total / self.calls if self.calls else 0.0
+
+    def __repr__(self):
+        return ('%s(%r, calls=%d, blocked=%d, total=%.6f, max=%.6f)'
+                % (type(self).__name__, self.name, self.calls, self.blocked,
+                   self.total, self.max))
+
+
+class BlockingDetector(Tracer):
+    """ A ``Tracer`` finding stages that hold the event loop too long
+
+    Every other task waits while a stage runs between two awaits: for a
+    sync stage, or a curried sync function such as ``groupby``, that is its
+    whole call.  Slices of time held for ``threshold`` seconds or more are
+    passed to ``report`` as ``Blocked(name, duration, call_site)``, or
+    logged as warnings on the ``'aiotoolz'`` logger.  ``stats`` maps the
+    name of every stage seen to its ``BlockingStats``.  Time held by nested
+    stages, such as the functions of a ``compose`` used in a ``pipe``, is
+    only counted for the innermost stage.
+
+    >>> from aiotoolz import add_tracer
+    >>> detector = add_tracer(BlockingDetector(0.05))  # doctest: +SKIP
+    >>> await pipe(data, parse, curried.groupby(key))  # doctest: +SKIP
+    >>> detector.summary()[:1]  # doctest: +SKIP
+    [BlockingStats('groupby', calls=1, blocked=1, total=0.2, max=0.2)]
+
+    See Also:
+        aiotoolz.functoolz.add_tracer
+    """
+    def __init__(self, threshold=0.1, report=None):
+        self.threshold = threshold
+        self.report = report if report is not None else self._log
+        self.stats = {}
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = BlockingStats(name)
+        return stats
+
+    def start(self, name):
+        self._stats(name).calls += 1
+
+    def held(self, token, name, duration):
+        stats = self._stats(name)
+        stats.total += duration
+        if duration > stats.max:
+            stats.max = duration
+        if duration >= self.threshold:
+            stats.blocked += 1
+            self.report(Blocked(name, duration, _call_site()))
+
+    def summary(self):
+        """ The ``BlockingStats`` of every stage, longest total first """
+        return sorted(self.stats.values(), key=lambda s: s.total,
+                      reverse=True)
+
+    def reset(self):
+        """ Forget the statistics gathered so far """
+        self.stats.clear()
+
+    @staticmethod
+    def _log(blocked):
+        _logger.warning('stage %s held the event loop for %.3fs at %s',
+                        blocked.name, blocked.duration, blocked.call_site)
+
+
+MeterSnapshot = namedtuple('MeterSnapshot', [
+    'count', 'bytes', 'elapsed', 'rate', 'byte_rate', 'mean_rate',
+    'in_flight', 'total', 'eta'])
+MeterSnapshot.__doc__ = """ The progress of a ``Meter``
+
+``count`` items and ``bytes`` bytes went through the meter in ``elapsed``
+seconds.  ``rate`` and ``byte_rate`` are per second since the previous
+periodic snapshot, and ``mean_rate`` items per second overall.
+``in_flight`` counts the requests for items waiting on the source.
+``total`` and ``eta``, in seconds, are ``None`` if the length is unknown.
+"""
+
+
+class Meter(object):
+    """ A pass-through stage measuring the throughput and progress of items
+
+    ``meter.iter(seq)`` and ``meter.aiter(seq)`` iterate, synchronously or
+    asynchronously, over the items of ``seq`` while counting them, and
+    awaiting ``meter(seq)`` picks one of them for use in a ``pipe``.
+
+    >>> meter = Meter(callback=print)  # doctest: +SKIP
+    >>> await pipe(rows, meter, partition_all(100), process)  # doctest: +SKIP
+    MeterSnapshot(count=1000, bytes=0, elapsed=0.8, rate=1250.0, ...)
+
+    Items are only counted as they pass; the clock is read every ``every``
+    items, and ``callback`` is then called with a ``MeterSnapshot`` if
+    ``interval`` seconds passed since it was last called, as well as once
+    the items run out.  ``meter.snapshot()`` can be polled instead.  With
+    ``size``, ``size(item)`` bytes are counted for every item.  ``total`` is
+    the number of items expected, by default the length of ``seq`` if it
+    has one, and gives an estimate of the time left.
+
+    See Also:
+        MeterSnapshot
+    """
+    def __init__(self, total=None, size=None, every=1000, interval=1.0,
+                 callback=None):
+        self.total = total
+        self.size = size
+        self.every = every
+        self.interval = interval
+        self.callback = callback
+        self.count = 0
+        self.bytes = 0
+        self.in_flight = 0
+        self._countdown = every
+        self._start = None
+        self._mark = None  # (time, count, bytes) of the last snapshot
+
+    def _begin(self, seq):
+        if self._start is None:
+            self._start = time.monotonic()
+            self._mark = (self._start, 0, 0)
+        if self.total is None:
+            try:
+                self.total = len(seq)
+            except TypeError:
+                pass
+
+    def _add(self, item):
+        self.count += 1
+        if self.size is not None:
+            self.bytes += self.size(item)
+        self._countdown -= 1
+        if not self._countdown:
+            self._countdown = self.every
+            self._tick(False)
+
+    def _tick(self, final):
+        now = time.monotonic()
+        if not final and now - self._mark[0] < self.interval:
+            return
+        snapshot = self._snapshot(now)
+        self._mark = (now, self.count, self.bytes)
+        if self.callback is not None:
+            self.callback(snapshot)
+
+    def _snapshot(self, now):
+        mark, count, nbytes = self._mark
+        elapsed = now - self._start
+        since = now - mark
+        if since > 0:
+            rate = (self.count - count) / since
+            byte_rate = (self.bytes - nbytes) / since
+        else:
+            rate = byte_rate = 0.0
+        mean_rate = self.count / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total is not None and mean_rate > 0:
+            eta = max(self.total - self.count, 0) / mean_rate
+        return MeterSnapshot(self.count, self.bytes, elapsed, rate,
+                             byte_rate, mean_rate, self.in_flight,
+                             self.total, eta)
+
+    def snapshot(self):
+        """ The current ``MeterSnapshot``, or ``None`` before any items """
+        if self._start is None:
+            return None
+        return self._snapshot(time.monotonic())
+
+    def iter(self, seq):
+        """ Iterate over ``seq``, counting its items """
+        self._begin(seq)
+        it = iter(seq)
+        while True:
+            self.in_flight += 1
+            try:
+                item = next(it)
+            except StopIteration:
+                break
+            finally:
+                self.in_flight -= 1
+            self._add(item)
+            yield item
+        self._tick(True)
+
+    def aiter(self, seq):
+        """ Iterate asynchronously over ``seq``, counting its items """
+        self._begin(seq)
+        return _MeteredIterator(self, seq.__aiter__())
+
+    async def __call__(self, seq):
+        if hasattr(seq, '__aiter__'):
+            return self.aiter(seq)
+        return self.iter(seq)
+
+
+class _MeteredIterator(object):
+    """ An async iterator counting the items of another in a ``Meter`` """
+    __slots__ = ('meter', 'iterator', 'finished')
+
+    def __init__(self, meter, iterator):
+        self.meter = meter
+        self.iterator = iterator
+        self.finished = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        meter = self.meter
+        meter.in_flight += 1
+        try:
+            try:
+                item = await self.iterator.__anext__()
+            finally:
+                meter.in_flight -= 1
+        except StopAsyncIteration:
+            if not self.finished:
+                self.finished = True
+                meter._tick(True)
+            raise
+        meter._add(item)
+        return item
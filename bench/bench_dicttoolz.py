@@ -0,0 +1,167 @@
+import aiotoolz
+from harness import case, toolz
+
+has_toolz = toolz is not None
+
+small = {i: i for i in range(10)}
+other = {i: -i for i in range(5, 15)}
+nested = {'a': {'b': {'c': 1}}}
+
+
+def inc(x):
+    return x + 1
+
+
+async def ainc(x):
+    return x + 1
+
+
+async def asum(xs):
+    return sum(xs)
+
+
+# merge: merge two small dicts
+
+@case('merge', 'plain')
+def merge_plain(n):
+    for i in range(n):
+        d = dict(small)
+        d.update(other)
+
+
+@case('merge', 'toolz', available=has_toolz)
+def merge_toolz(n):
+    merge = toolz.merge
+    for i in range(n):
+        merge(small, other)
+
+
+@case('merge', 'aiotoolz')
+def merge_aiotoolz(n):
+    merge = aiotoolz.merge
+    for i in range(n):
+        merge(small, other)
+
+
+# merge_with: merge two small dicts, summing the values of common keys
+
+@case('merge_with', 'plain')
+def merge_with_plain(n):
+    for i in range(n):
+        d = {}
+        for m in (small, other):
+            for k, v in m.items():
+                d.setdefault(k, []).append(v)
+        {k: sum(v) for k, v in d.items()}
+
+
+@case('merge_with', 'toolz', available=has_toolz)
+def merge_with_toolz(n):
+    merge_with = toolz.merge_with
+    for i in range(n):
+        merge_with(sum, small, other)
+
+
+@case('merge_with', 'aiotoolz', number=1000)
+async def merge_with_aiotoolz(n):
+    merge_with = aiotoolz.merge_with
+    for i in range(n):
+        await merge_with(asum, small, other)
+
+
+# valmap: apply a function to the values of a small dict
+
+@case('valmap', 'plain')
+def valmap_plain(n):
+    for i in range(n):
+        {k: inc(v) for k, v in small.items()}
+
+
+@case('valmap', 'toolz', available=has_toolz)
+def valmap_toolz(n):
+    valmap = toolz.valmap
+    for i in range(n):
+        valmap(inc, small)
+
+
+@case('valmap', 'aiotoolz', number=1000)
+async def valmap_aiotoolz(n):
+    valmap = aiotoolz.valmap
+    for i in range(n):
+        await valmap(ainc, small)
+
+
+# assoc: add a key to a small dict
+
+@case('assoc', 'plain')
+def assoc_plain(n):
+    for i in range(n):
+        d = dict(small)
+        d['x'] = i
+
+
+@case('assoc', 'toolz', available=has_toolz)
+def assoc_toolz(n):
+    assoc = toolz.assoc
+    for i in range(n):
+        assoc(small, 'x', i)
+
+
+@case('assoc', 'aiotoolz')
+def assoc_aiotoolz(n):
+    assoc = aiotoolz.assoc
+    for i in range(n):
+        assoc(small, 'x', i)
+
+
+# get_in: get a value nested three levels deep
+
+@case('get_in', 'plain')
+def get_in_plain(n):
+    for i in range(n):
+        nested['a']['b']['c']
+
+
+@case('get_in', 'toolz', available=has_toolz)
+def get_in_toolz(n):
+    get_in = toolz.get_in
+    keys = ['a', 'b', 'c']
+    for i in range(n):
+        get_in(keys, nested)
+
+
+@case('get_in', 'aiotoolz')
+def get_in_aiotoolz(n):
+    get_in = aiotoolz.get_in
+    keys = ['a', 'b', 'c']
+    for i in range(n):
+        get_in(keys, nested)
+
+
+# update_in: update a value nested three levels deep
+
+@case('update_in', 'plain')
+def update_in_plain(n):
+    for i in range(n):
+        b = dict(nested['a']['b'])
+        b['c'] = inc(b['c'])
+        a = dict(nested['a'])
+        a['b'] = b
+        d = dict(nested)
+        d['a'] = a
+
+
+@case('update_in', 'toolz', available=has_toolz)
+def update_in_toolz(n):
+    update_in = toolz.update_in
+    keys = ['a', 'b', 'c']
+    for i in range(n):
+        update_in(nested, keys, inc)
+
+
+@case('update_in', 'aiotoolz')
+async def update_in_aiotoolz(n):
+    update_in = aiotoolz.update_in
+    keys = ['a', 'b', 'c']
+    for i in range(n):
+        await update_in(nested, keys, ainc)
@@ -0,0 +1,219 @@
+from functools import partial
+from operator import add
+
+import aiotoolz
+from harness import case, toolz
+
+has_toolz = toolz is not None
+
+
+def inc(x):
+    return x + 1
+
+
+def double(x):
+    return x * 2
+
+
+async def ainc(x):
+    return x + 1
+
+
+async def adouble(x):
+    return x * 2
+
+
+# curry: call a function of two arguments with the first one bound
+
+@case('curry', 'plain')
+def curry_plain(n):
+    f = partial(add, 1)
+    for i in range(n):
+        f(i)
+
+
+@case('curry', 'toolz', available=has_toolz)
+def curry_toolz(n):
+    f = toolz.curry(add)(1)
+    for i in range(n):
+        f(i)
+
+
+@case('curry', 'aiotoolz')
+async def curry_aiotoolz(n):
+    f = await aiotoolz.curry(add)(1)
+    for i in range(n):
+        await f(i)
+
+
+# compose: call a composition of two functions
+
+@case('compose', 'plain')
+def compose_plain(n):
+    for i in range(n):
+        double(inc(i))
+
+
+@case('compose', 'plain async')
+async def compose_plain_async(n):
+    for i in range(n):
+        await adouble(await ainc(i))
+
+
+@case('compose', 'toolz', available=has_toolz)
+def compose_toolz(n):
+    f = toolz.compose(double, inc)
+    for i in range(n):
+        f(i)
+
+
+@case('compose', 'aiotoolz')
+async def compose_aiotoolz(n):
+    f = aiotoolz.compose(adouble, ainc)
+    for i in range(n):
+        await f(i)
+
+
+# pipe: pipe a value through two functions
+
+@case('pipe', 'plain')
+def pipe_plain(n):
+    for i in range(n):
+        double(inc(i))
+
+
+@case('pipe', 'toolz', available=has_toolz)
+def pipe_toolz(n):
+    pipe = toolz.pipe
+    for i in range(n):
+        pipe(i, inc, double)
+
+
+@case('pipe', 'aiotoolz')
+async def pipe_aiotoolz(n):
+    pipe = aiotoolz.pipe
+    for i in range(n):
+        await pipe(i, ainc, adouble)
+
+
+# thread_first: thread a value through a function and a form
+
+@case('thread_first', 'plain')
+def thread_first_plain(n):
+    for i in range(n):
+        add(inc(i), 2)
+
+
+@case('thread_first', 'toolz', available=has_toolz)
+def thread_first_toolz(n):
+    thread_first = toolz.thread_first
+    for i in range(n):
+        thread_first(i, inc, (add, 2))
+
+
+@case('thread_first', 'aiotoolz')
+async def thread_first_aiotoolz(n):
+    thread_first = aiotoolz.thread_first
+    for i in range(n):
+        await thread_first(i, inc, (add, 2))
+
+
+@case('thread_first', 'aiotoolz compiled')
+async def thread_first_aiotoolz_compiled(n):
+    f = aiotoolz.compile_thread_first(inc, (add, 2))
+    for i in range(n):
+        await f(i)
+
+
+# juxt: call two functions with the same argument
+
+@case('juxt', 'plain')
+def juxt_plain(n):
+    for i in range(n):
+        (inc(i), double(i))
+
+
+@case('juxt', 'toolz', available=has_toolz)
+def juxt_toolz(n):
+    f = toolz.juxt(inc, double)
+    for i in range(n):
+        f(i)
+
+
+@case('juxt', 'aiotoolz')
+async def juxt_aiotoolz(n):
+    f = aiotoolz.juxt(ainc, adouble)
+    for i in range(n):
+        await f(i)
+
+
+# memoize: call a memoized function with a cached argument
+
+@case('memoize', 'plain')
+def memoize_plain(n):
+    cache = {}
+
+    def f(x):
+        try:
+            return cache[x]
+        except KeyError:
+            result = cache[x] = x
+            return result
+
+    for i in range(n):
+        f(3)
+
+
+@case('memoize', 'toolz', available=has_toolz)
+def memoize_toolz(n):
+    f = toolz.memoize(lambda x: x)
+    for i in range(n):
+        f(3)
+
+
+@case('memoize', 'aiotoolz')
+async def memoize_aiotoolz(n):
+    async def identity(x):
+        return x
+
+    f = await aiotoolz.memoize(identity)
+    for i in range(n):
+        await f(3)
+
+
+# memoize_kwargs: as memoize, for a function with keyword arguments
+
+@case('memoize_kwargs', 'plain')
+def memoize_kwargs_plain(n):
+    cache = {}
+
+    def f(x, y=3):
+        key = (x, frozenset([('y', y)]))
+        try:
+            return cache[key]
+        except KeyError:
+            result = cache[key] = x
+            return result
+
+    for i in range(n):
+        f(3)
+
+
+@case('memoize_kwargs', 'toolz', available=has_toolz)
+def memoize_kwargs_toolz(n):
+    def f(x, y=3):
+        return x
+
+    f = toolz.memoize(f)
+    for i in range(n):
+        f(3)
+
+
+@case('memoize_kwargs', 'aiotoolz')
+async def memoize_kwargs_aiotoolz(n):
+    async def f(x, y=3):
+        return x
+
+    f = await aiotoolz.memoize(f)
+    for i in range(n):
+        await f(3)
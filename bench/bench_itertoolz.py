@@ -0,0 +1,134 @@
+import aiotoolz
+from harness import case, toolz
+
+has_toolz = toolz is not None
+
+pairs = [(1, 2)] * 1000
+tuples = [(1, 2, 3)] * 1000
+data = list(range(1000)) * 10
+
+
+def burn(seq):
+    for item in seq:
+        pass
+
+
+def implementations(group, number, func):
+    """ Register ``func(module)`` as a case for both toolz and aiotoolz """
+    case(group, 'toolz', number, available=has_toolz)(
+        lambda n: func(toolz, n))
+    case(group, 'aiotoolz', number)(lambda n: func(aiotoolz, n))
+
+
+# first: first item of a tuple
+
+@case('first', 'plain', number=1000)
+def first_plain(n):
+    for i in range(n):
+        for p in pairs:
+            p[0]
+
+
+def first(module, n):
+    first = module.first
+    for i in range(n):
+        for p in pairs:
+            first(p)
+
+
+implementations('first', 1000, first)
+
+
+# get: one and several items of a tuple
+
+def get(module, n):
+    get = module.get
+    for i in range(n):
+        for t in tuples:
+            get(1, t)
+
+
+implementations('get', 1000, get)
+
+
+def get_list(module, n):
+    get = module.get
+    for i in range(n):
+        for t in tuples:
+            get([1, 2], t)
+
+
+implementations('get_list', 100, get_list)
+
+
+# pluck: an item of each tuple, with a default as aiotoolz.pluck maps
+# through paco otherwise, which needs a coroutine function
+
+@case('pluck', 'plain', number=1000)
+def pluck_plain(n):
+    for i in range(n):
+        burn(t[2] for t in tuples)
+
+
+def pluck(module, n):
+    pluck = module.pluck
+    for i in range(n):
+        burn(pluck(2, tuples, None))
+
+
+implementations('pluck', 1000, pluck)
+
+
+# groupby, frequencies: over 10000 items with 1000 distinct values
+
+@case('groupby', 'plain', number=100)
+def groupby_plain(n):
+    for i in range(n):
+        d = {}
+        for x in data:
+            d.setdefault(x, []).append(x)
+
+
+def groupby(module, n):
+    groupby, identity = module.groupby, module.identity
+    for i in range(n):
+        groupby(identity, data)
+
+
+implementations('groupby', 100, groupby)
+
+
+def frequencies(module, n):
+    frequencies = module.frequencies
+    for i in range(n):
+        frequencies(data)
+
+
+implementations('frequencies', 100, frequencies)
+
+
+# sliding_window: windows of 3 over 10000 items
+
+def sliding_window(module, n):
+    sliding_window = module.sliding_window
+    for i in range(n):
+        burn(sliding_window(3, data))
+
+
+implementations('sliding_window', 100, sliding_window)
+
+
+# join: a many to many join of 1000 and 1100 items
+
+left = [(i, str(i)) for i in range(100)] * 10
+right = list(range(110)) * 10
+
+
+def join(module, n):
+    join, identity = module.join, module.identity
+    first = module.first
+    for i in range(n):
+        burn(join(first, left, identity, right))
+
+
+implementations('join', 10, join)
@@ -0,0 +1,194 @@
+""" Benchmarks sweeping the input size and key cardinality
+
+Each case processes one generated input of ``n`` items per call; the
+``scaling`` exponents of the report show how the time grows with ``n``.
+"""
+from collections import Counter
+
+import aiotoolz
+import datasets
+from harness import case, toolz
+
+has_toolz = toolz is not None
+
+SIZES = [1000, 10000, 100000]
+CARDINALITIES = [10, 1000]
+
+# Roughly the number of items processed per timed run of every case
+ITEMS = 200000
+
+
+def burn(seq):
+    for item in seq:
+        pass
+
+
+def sweep(group, func, plain=None, cardinalities=CARDINALITIES):
+    """ Register ``func(module, data)`` over the sizes and cardinalities
+
+    ``func`` is run with ``toolz`` and ``aiotoolz``, and ``plain(data)`` as
+    a baseline if given; ``data`` is built by the ``make_<group>`` function
+    of this module from ``n`` and ``k``.
+    """
+    make = globals()['make_' + group]
+    for n in SIZES:
+        for k in cardinalities:
+            params = {'n': n, 'k': k} if k is not None else {'n': n}
+            number = max(ITEMS // n, 1)
+            data = _Lazy(make, n, k)
+            impls = [('toolz', toolz, has_toolz), ('aiotoolz', aiotoolz, True)]
+            if plain is not None:
+                case(group, 'plain', number, params=params)(
+                    _bind(plain, None, data))
+            for impl, module, available in impls:
+                case(group, impl, number, available, params)(
+                    _bind(func, module, data))
+
+
+class _Lazy(object):
+    """ Data generated on first use, so listing the cases stays cheap """
+    __slots__ = ('make', 'args', 'value')
+
+    def __init__(self, make, *args):
+        self.make = make
+        self.args = args
+        self.value = None
+
+    def get(self):
+        if self.value is None:
+            self.value = self.make(*self.args)
+        return self.value
+
+
+def _bind(func, module, data):
+    if module is None:
+        def run(number):
+            d = data.get()
+            for i in range(number):
+                func(d)
+    else:
+        def run(number):
+            d = data.get()
+            for i in range(number):
+                func(module, d)
+    return run
+
+
+# groupby and frequencies: skewed integer keys
+
+def make_groupby(n, k):
+    return datasets.skewed_keys(n, k)
+
+
+make_frequencies = make_groupby
+
+
+def groupby_plain(keys):
+    d = {}
+    for key in keys:
+        d.setdefault(key, []).append(key)
+
+
+def groupby(module, keys):
+    module.groupby(module.identity, keys)
+
+
+sweep('groupby', groupby, groupby_plain)
+
+
+def frequencies(module, keys):
+    module.frequencies(keys)
+
+
+sweep('frequencies', frequencies, Counter)
+
+
+# reduceby: sum the amounts of nested records by user
+
+def make_reduceby(n, k):
+    return datasets.records(n, users=k)
+
+
+def reduceby_plain(records):
+    totals = {}
+    for r in records:
+        key = r['user']['id']
+        totals[key] = totals.get(key, 0) + r['amount']
+
+
+def _user(r):
+    return r['user']['id']
+
+
+def _add_amount(total, r):
+    return total + r['amount']
+
+
+def reduceby(module, records):
+    module.reduceby(_user, _add_amount, records, 0)
+
+
+sweep('reduceby', reduceby, reduceby_plain)
+
+
+# join: uniform left keys against skewed right keys, with as many rows on
+# each side and a result that grows as n**2 / k
+
+def make_join(n, k):
+    return datasets.join_tables(n, n, k)
+
+
+def join(module, tables):
+    first = module.first
+    burn(module.join(first, tables[0], first, tables[1]))
+
+
+sweep('join', join, cardinalities=[10000, 100000])
+
+
+# merge_sorted: merge k sorted shards
+
+def make_merge_sorted(n, k):
+    return datasets.sorted_shards(n, k)
+
+
+def merge_sorted(module, shards):
+    burn(module.merge_sorted(*shards))
+
+
+sweep('merge_sorted', merge_sorted, cardinalities=[2, 64])
+
+
+# sliding_window: windows of 3 over words
+
+def make_sliding_window(n, k):
+    return datasets.zipf_words(n)
+
+
+def sliding_window(module, words):
+    burn(module.sliding_window(3, words))
+
+
+sweep('sliding_window', sliding_window, cardinalities=[None])
+
+
+# wordcount: count the stemmed words of a generated text
+
+def make_wordcount(n, k):
+    return datasets.text(n // 10, vocabulary=k)
+
+
+def stem(word):
+    """ Stem word to primitive form """
+    return word.lower().rstrip(",.!:;'-\"").lstrip("'\"")
+
+
+def wordcount_plain(lines):
+    Counter(stem(word) for line in lines for word in line.split())
+
+
+def wordcount(module, lines):
+    module.frequencies(map(stem, module.concat(map(str.split, lines))))
+
+
+sweep('wordcount', wordcount, wordcount_plain, cardinalities=[10000])
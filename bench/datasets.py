@@ -0,0 +1,128 @@
+""" Deterministic synthetic datasets for the benchmarks
+
+Every generator takes a ``seed`` and builds its data locally, so runs are
+reproducible and need no network access.
+"""
+from bisect import bisect
+from itertools import accumulate
+import random
+
+
+__all__ = ('words', 'zipf_words', 'text', 'skewed_keys', 'join_tables',
+           'records', 'sorted_shards')
+
+_SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'we', 'zu',
+              'an', 'el', 'is', 'or', 'ul', 'th', 'qu', 'ph', 'st', 'ch']
+
+
+def words(count, seed=0):
+    """ ``count`` distinct pronounceable words """
+    rng = random.Random(seed)
+    seen = set()
+    result = []
+    while len(result) < count:
+        word = ''.join(rng.choice(_SYLLABLES)
+                       for i in range(rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            result.append(word)
+    return result
+
+
+def _zipf_sampler(cardinality, s, rng):
+    """ A function drawing ranks in ``range(cardinality)``, Zipf-distributed
+
+    Rank ``k`` is drawn with probability proportional to ``1 / (k + 1)**s``.
+    """
+    cumulative = list(accumulate(1.0 / (k + 1) ** s
+                                 for k in range(cardinality)))
+    total = cumulative[-1]
+    last = cardinality - 1
+
+    def sample():
+        return min(bisect(cumulative, rng.random() * total), last)
+    return sample
+
+
+def zipf_words(n, vocabulary=10000, s=1.1, seed=0):
+    """ ``n`` words drawn from ``vocabulary`` words with Zipf's law
+
+    Like in natural text, few words are very frequent and most are rare.
+    """
+    rng = random.Random(seed)
+    vocab = words(vocabulary, seed)
+    sample = _zipf_sampler(vocabulary, s, rng)
+    return [vocab[sample()] for i in range(n)]
+
+
+def text(lines, words_per_line=10, vocabulary=10000, seed=0):
+    """ ``lines`` lines of Zipf-distributed words with case and punctuation
+
+    A stand-in for a book, for word counting.
+    """
+    rng = random.Random(seed)
+    tokens = zipf_words(lines * words_per_line, vocabulary, seed=seed)
+    result = []
+    for i in range(lines):
+        line = tokens[i * words_per_line:(i + 1) * words_per_line]
+        line = [word.capitalize() if rng.random() < 0.1 else word
+                for word in line]
+        line[-1] += rng.choice('.,;!?')
+        result.append(' '.join(line) + '\n')
+    return result
+
+
+def skewed_keys(n, cardinality, s=1.0, seed=0):
+    """ ``n`` integer keys in ``range(cardinality)``, Zipf-distributed
+
+    With ``s=0`` keys are uniform; the larger ``s``, the more the first keys
+    dominate, as with hot keys in real joins and group-bys.
+    """
+    rng = random.Random(seed)
+    sample = _zipf_sampler(cardinality, s, rng)
+    return [sample() for i in range(n)]
+
+
+def join_tables(n_left, n_right, cardinality, s=1.0, seed=0):
+    """ Two lists of ``(key, value)`` pairs with skewed keys to join on
+
+    The left keys are uniform and the right keys skewed, so the hot keys of
+    the right side match many rows.
+    """
+    left = [(key, i) for i, key in
+            enumerate(skewed_keys(n_left, cardinality, 0, seed))]
+    right = [(key, -i) for i, key in
+             enumerate(skewed_keys(n_right, cardinality, s, seed + 1))]
+    return left, right
+
+
+def records(n, users=1000, seed=0):
+    """ ``n`` nested JSON-like dicts, as decoded from an event log """
+    rng = random.Random(seed)
+    names = words(users, seed)
+    user = _zipf_sampler(users, 1.0, rng)
+    kinds = ['click', 'view', 'purchase', 'signup']
+    result = []
+    for i in range(n):
+        u = user()
+        result.append({
+            'id': i,
+            'kind': rng.choice(kinds),
+            'user': {'id': u, 'name': names[u],
+                     'tags': rng.sample(_SYLLABLES, rng.randint(0, 3))},
+            'amount': round(rng.uniform(0, 100), 2),
+            'meta': {'source': rng.choice(['web', 'app', 'api']),
+                     'retries': rng.randint(0, 2)},
+        })
+    return result
+
+
+def sorted_shards(n, shards, seed=0):
+    """ ``shards`` sorted lists of integers, ``n`` integers in total """
+    rng = random.Random(seed)
+    result = [[] for i in range(shards)]
+    for i in range(n):
+        result[rng.randrange(shards)].append(rng.randrange(n * 10))
+    for shard in result:
+        shard.sort()
+    return result
@@ -0,0 +1,248 @@
+""" Register benchmark cases and time them, driving coroutines in a loop
+
+A case is a function of ``n`` making ``n`` calls of the operation it
+measures.  It may be a coroutine function, in which case it is awaited
+within a running event loop, so only the awaits it makes are timed and not
+the loop startup.  Cases of the same ``group`` measure the same operation
+with different implementations: ``'plain'`` Python, ``'toolz'`` and
+``'aiotoolz'``, so the report gives the cost of each relative to plain
+Python.
+
+Cases can also sweep the input size ``n`` and other ``params``; ``scaling``
+then estimates how the time per call grows with ``n`` for each series.
+"""
+import asyncio
+import gc
+import inspect
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+
+try:
+    import toolz
+except ImportError:  # pragma: no cover
+    toolz = None
+
+import aiotoolz
+
+
+__all__ = ('case', 'cases', 'run', 'scaling', 'environment', 'report',
+           'main')
+
+_cases = []
+
+
+class Case(object):
+    __slots__ = ('group', 'impl', 'func', 'number', 'params')
+
+    def __init__(self, group, impl, func, number, params=None):
+        self.group = group
+        self.impl = impl
+        self.func = func
+        self.number = number
+        self.params = params or {}
+
+    @property
+    def name(self):
+        name = '%s[%s]' % (self.group, self.impl)
+        if self.params:
+            name += ' ' + ' '.join('%s=%s' % item
+                                   for item in sorted(self.params.items()))
+        return name
+
+
+def case(group, impl, number=10000, available=True, params=None):
+    """ Register a benchmark case, timed over ``number`` calls
+
+    Cases that are not ``available``, such as those of ``toolz`` when it is
+    not installed, are not registered.  ``params`` describe the input of
+    the case, with ``n`` its size.
+    """
+    def register(func):
+        if available:
+            _cases.append(Case(group, impl, func, number, params))
+        return func
+    return register
+
+
+def cases(pattern=None):
+    """ The registered cases whose name contains ``pattern`` """
+    return [c for c in _cases if pattern is None or pattern in c.name]
+
+
+def _time(case, number, loop):
+    if inspect.iscoroutinefunction(case.func):
+        async def timed():
+            start = time.perf_counter()
+            await case.func(number)
+            return time.perf_counter() - start
+        return loop.run_until_complete(timed())
+    start = time.perf_counter()
+    case.func(number)
+    return time.perf_counter() - start
+
+
+def run(selected, repeat=5, scale=1.0, loop=None):
+    """ Time ``selected`` cases ``repeat`` times, returning result dicts
+
+    Coroutine cases run in ``loop``, or in a new event loop closed once
+    done.
+    """
+    own_loop = loop is None
+    if own_loop:
+        loop = asyncio.new_event_loop()
+    results = []
+    gc_enabled = gc.isenabled()
+    try:
+        for c in selected:
+            number = max(int(c.number * scale), 1)
+            _time(c, max(number // 10, 1), loop)  # warm up
+            times = []
+            for i in range(repeat):
+                gc.collect()
+                gc.disable()
+                try:
+                    times.append(_time(c, number, loop))
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+            best = min(times)
+            results.append({
+                'name': c.name,
+                'group': c.group,
+                'impl': c.impl,
+                'params': c.params,
+                'number': number,
+                'times': times,
+                'best': best,
+                'median': statistics.median(times),
+                'per_call_ns': best / number * 1e9,
+            })
+    finally:
+        if own_loop:
+            loop.close()
+    _add_ratios(results)
+    return results
+
+
+def _add_ratios(results):
+    def key(r):
+        return r['group'], tuple(sorted(r['params'].items()))
+
+    plain = {key(r): r['per_call_ns'] for r in results
+             if r['impl'] == 'plain'}
+    for r in results:
+        base = plain.get(key(r))
+        r['vs_plain'] = r['per_call_ns'] / base if base else None
+
+
+def scaling(results):
+    """ The exponent of the growth of the time per call with ``n``
+
+    Results differing only by their ``n`` param form a series, and the
+    exponent is the slope of the least squares fit of ``log(time)`` on
+    ``log(n)``: about 1 for linear and 2 for quadratic behaviour.
+    """
+    series = {}
+    for r in results:
+        params = dict(r['params'])
+        n = params.pop('n', None)
+        if n is None:
+            continue
+        key = '%s[%s]' % (r['group'], r['impl'])
+        if params:
+            key += ' ' + ' '.join('%s=%s' % item
+                                  for item in sorted(params.items()))
+        series.setdefault(key, []).append((math.log(n),
+                                           math.log(r['per_call_ns'])))
+    exponents = {}
+    for key, points in sorted(series.items()):
+        if len(points) < 2:
+            continue
+        mx = sum(x for x, y in points) / len(points)
+        my = sum(y for x, y in points) / len(points)
+        var = sum((x - mx) ** 2 for x, y in points)
+        if var:
+            exponents[key] = sum((x - mx) * (y - my)
+                                 for x, y in points) / var
+    return exponents
+
+
+def environment():
+    """ The versions the results were measured with """
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'aiotoolz': aiotoolz.__version__,
+        'toolz': getattr(toolz, '__version__', None),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def report(results, previous=None, file=None):
+    """ Print ``results`` as a table of the time per call
+
+    With the ``results`` of a ``previous`` run, the change of the time per
+    call of each case since then is shown too.
+    """
+    file = file or sys.stdout
+    before = {r['name']: r['per_call_ns'] for r in previous or ()}
+    print('%-48s %14s %10s %10s' % ('case', 'ns/call', 'vs plain',
+                                    'vs before'), file=file)
+    for r in results:
+        ratio = '' if r['vs_plain'] is None else '%.2fx' % r['vs_plain']
+        change = ''
+        if r['name'] in before:
+            change = '%+.1f%%' % (
+                (r['per_call_ns'] / before[r['name']] - 1) * 100)
+        print('%-48s %14.1f %10s %10s' % (r['name'], r['per_call_ns'],
+                                          ratio, change), file=file)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default=None,
+                        help='only run cases whose name contains PATTERN')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply the number of calls of every case')
+    parser.add_argument('--json', dest='json_path', default=None,
+                        help='write the results as JSON to this path '
+                             '("-" for stdout)')
+    parser.add_argument('--compare', dest='compare_path', default=None,
+                        help='compare with the JSON results at this path')
+    parser.add_argument('--list', action='store_true',
+                        help='list the cases instead of running them')
+    args = parser.parse_args(argv)
+
+    selected = cases(args.pattern)
+    if args.list:
+        for c in selected:
+            print(c.name)
+        return 0
+    results = run(selected, repeat=args.repeat, scale=args.scale)
+    exponents = scaling(results)
+    data = {'environment': environment(), 'results': results,
+            'scaling': exponents}
+    if args.json_path == '-':
+        json.dump(data, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        previous = None
+        if args.compare_path:
+            with open(args.compare_path) as f:
+                previous = json.load(f)['results']
+        report(results, previous)
+        if exponents:
+            print('\n%-60s %8s' % ('series', 'exponent'))
+            for key, exponent in sorted(exponents.items()):
+                print('%-60s %8.2f' % (key, exponent))
+        if args.json_path:
+            with open(args.json_path, 'w') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+    return 0
@@ -0,0 +1,23 @@
+""" Run the benchmark suite
+
+Cases are registered by the ``bench_*`` modules below; see ``harness``.
+Run from the repository root, with aiotoolz installed or on ``PYTHONPATH``:
+
+    $ python bench/run.py                    # print a table
+    $ python bench/run.py -k memoize         # only the memoize cases
+    $ python bench/run.py --json out.json    # also save the results
+    $ python bench/run.py --compare out.json # compare with saved results
+"""
+from importlib import import_module
+import sys
+
+import harness
+
+MODULES = ['bench_functoolz', 'bench_dicttoolz', 'bench_itertoolz',
+           'bench_scaling']
+
+
+if __name__ == '__main__':
+    for name in MODULES:
+        import_module(name)
+    sys.exit(harness.main())
@@ -0,0 +1,75 @@
+import subprocess
+import sys
+
+
+def importtime(statement):
+    """ Cumulative import time in microseconds of top-level imports
+
+    ``statement`` is run in a fresh interpreter with ``python -X importtime``
+    (Python 3.7+), so nothing is already cached in ``sys.modules``.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                           statement],
+                          stderr=subprocess.PIPE, check=True,
+                          universal_newlines=True)
+    rv = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name == 'site':
+            # Everything up to here is interpreter startup
+            rv.clear()
+        elif not line.endswith('  ' + name):
+            rv[name] = int(cumulative_us)
+    return rv
+
+
+def test_import_aiotoolz():
+    print(importtime('import aiotoolz'))
+
+
+def test_import_aiotoolz_is_lazy():
+    # The optional submodules are only imported on first attribute access
+    lazy = ['aiotoolz.recipes', 'aiotoolz.caches', 'aiotoolz.tracing',
+            'aiotoolz.sandbox']
+    code = ('import sys, aiotoolz; '
+            'print(*[name in sys.modules for name in %r])' % (lazy,))
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.split() == [b'False'] * len(lazy)
+
+
+def imported_modules(statement):
+    """ Names of the modules ``statement`` imports in a fresh interpreter """
+    code = ('import sys; before = set(sys.modules); %s; '
+            'print(*sorted(set(sys.modules) - before))' % statement)
+    out = subprocess.check_output([sys.executable, '-c', code],
+                                  universal_newlines=True)
+    return out.split()
+
+
+def test_import_aiotoolz_module_count():
+    # The baseline import pulled in recipes, sandbox (with sandbox.core and
+    # sandbox.parallel) and _signatures eagerly; none of them may come back
+    baseline = imported_modules('import aiotoolz, aiotoolz.recipes, '
+                                'aiotoolz.sandbox, aiotoolz._signatures')
+    modules = imported_modules('import aiotoolz')
+    own = [name for name in modules if name.split('.')[0] == 'aiotoolz']
+    baseline_own = [name for name in baseline
+                    if name.split('.')[0] == 'aiotoolz']
+    print(len(modules), len(baseline), own)
+    assert len(modules) <= len(baseline) - 5
+    assert len(own) <= len(baseline_own) - 5
+
+
+def test_import_curried():
+    print(importtime('import aiotoolz.curried'))
+
+
+def test_import_curried_operator():
+    print(importtime('import aiotoolz.curried.operator'))
+
+
+def test_import_aiotlz():
+    print(importtime('import aiotlz'))
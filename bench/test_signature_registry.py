@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import aiotoolz._signatures as _sigs
+from aiotoolz.functoolz import is_valid_args
+
+
+def test_import_aiotoolz():
+    # Importing aiotoolz must not build the registry: no callable resolved
+    # and no signature spec expanded
+    code = ('import sys, aiotoolz; '
+            'print("aiotoolz._signatures" in sys.modules); '
+            'import aiotoolz._signatures as s; '
+            'print(len(s.signatures), s.signatures._pending is None)')
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.split() == [b'False', b'0', b'True']
+
+
+def test_create_signature_registry():
+    _sigs.create_signature_registry(signatures={})
+
+
+def test_lazy_signature_lookup():
+    for i in range(100):
+        registry = _sigs.SignatureRegistry()
+        registry[max]
+
+
+def test_builtin_introspection():
+    for i in range(10000):
+        is_valid_args(max, (1, 2), {})
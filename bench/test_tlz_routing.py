@@ -0,0 +1,29 @@
+import time
+
+from aiotlz._build_tlz import tlz_loader
+
+
+def inc(x):
+    return x + 1
+
+
+def best_time(func, *args, number=100, repeat=5):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        for j in range(number):
+            func(*args)
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def test_routing_overhead_is_independent_of_the_data():
+    # Routing checks the arguments, not the data they hold: a call on
+    # 100000 items must not cost more to route than a call on 10
+    has_async_args = tlz_loader.has_async_args
+    small = tuple((i, i) for i in range(10))
+    large = tuple((i, i) for i in range(100000))
+    kwargs = {}
+    t_small = best_time(has_async_args, (inc, small), kwargs)
+    t_large = best_time(has_async_args, (inc, large), kwargs)
+    assert t_large < 10 * t_small + 1e-5